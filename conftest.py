@@ -0,0 +1,6 @@
+"""
+Pytest configuration.
+
+Living at the repo root, this file makes pytest put the root on sys.path,
+so the tests can import mint under plain `pytest` as well as `python -m pytest`.
+"""
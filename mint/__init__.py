@@ -12,31 +12,47 @@ Core Components:
 - Database Manager: SQLite database creation and management
 """
 
-# Core components
-from .metrics import EvaluationMetrics
-from .utils import load_dataset, normalize_sql
+import importlib
 
-# New unified components
-try:
-    from .config import ViPERConfig
-    from .llm_interface import LLMInterface
-    from .template_manager import TemplateManager
-    from .strategy_manager import StrategyManager
+# Components are imported lazily (PEP 562) so that light-weight users such as
+# the dataset scripts or the evaluator do not pay for the LLM SDK imports.
+_LAZY_IMPORTS = {
+    # Core components
+    'EvaluationMetrics': '.metrics',
+    'load_dataset': '.utils',
+    'normalize_sql': '.utils',
+    
+    # New unified components
+    'ViPERConfig': '.config',
+    'LLMInterface': '.llm_interface',
+    'TemplateManager': '.template_manager',
+    'StrategyManager': '.strategy_manager',
     
     # Strategy implementations
-    from .strategies import (
-        ZeroShotStrategy,
-        FewShotStrategy, 
-        CoTStrategy
-    )
+    'ZeroShotStrategy': '.strategies',
+    'FewShotStrategy': '.strategies',
+    'CoTStrategy': '.strategies',
     
     # Evaluation and logging
-    from .evaluator import UnifiedEvaluator
-except ImportError as e:
-    print(f"Warning: Some MINT components failed to import: {e}")
-    # Provide minimal fallbacks
-    ViPERConfig = None
-    LLMInterface = None
+    'UnifiedEvaluator': '.evaluator',
+    'EvalResult': '.evaluator',
+}
+
+
+def __getattr__(name: str):
+    """Import package-level components on first access."""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """Include lazily imported components in dir(mint)."""
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
 
 __version__ = "2.0.0"
 __author__ = "ViPERSQL Research Team"
@@ -59,7 +75,8 @@ __all__ = [
     "CoTStrategy",
     
     # Evaluation and logging
-    "UnifiedEvaluator"
+    "UnifiedEvaluator",
+    "EvalResult"
 ]
 
 # Convenience imports for common usage patterns
@@ -74,6 +91,9 @@ def create_strategy(strategy_name: str = None, **kwargs):
     Returns:
         Strategy instance
     """
+    from .config import ViPERConfig
+    from .strategies import ZeroShotStrategy, FewShotStrategy, CoTStrategy
+    
     config = ViPERConfig(**kwargs)
     strategy_name = strategy_name or config.default_strategy
     
@@ -95,5 +115,8 @@ def create_unified_system(**kwargs):
     Returns:
         StrategyManager instance with all strategies loaded
     """
+    from .config import ViPERConfig
+    from .strategy_manager import StrategyManager
+    
     config = ViPERConfig(**kwargs)
     return StrategyManager(config)
@@ -6,12 +6,81 @@ environment variables, and command-line arguments.
 """
 
 import os
+import copy
 from typing import Dict, Any, Optional, Union
 from pathlib import Path
 from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
 
+# Environment variable names for each configuration field
+_ENV_MAPPING = {
+    # API Keys
+    'openai_api_key': 'OPENAI_API_KEY',
+    'anthropic_api_key': 'ANTHROPIC_API_KEY', 
+    'langchain_api_key': 'LANGCHAIN_API_KEY',
+    'langchain_tracing': 'LANGCHAIN_TRACING_V2',
+    
+    # Model Settings
+    'model_name': 'DEFAULT_MODEL',
+    'temperature': 'DEFAULT_TEMPERATURE',
+    'max_tokens': 'DEFAULT_MAX_TOKENS',
+    'timeout': 'DEFAULT_TIMEOUT',
+    
+    # Dataset Settings
+    'dataset_path': 'DATASET_PATH',
+    'split': 'DEFAULT_SPLIT',
+    'level': 'DEFAULT_LEVEL', 
+    'samples': 'DEFAULT_SAMPLES',
+    
+    # Strategy Settings
+    'strategy': 'DEFAULT_STRATEGY',
+    'template_dir': 'DEFAULT_TEMPLATE_DIR',
+    'template_name': 'DEFAULT_TEMPLATE',
+    
+    # Few-shot Settings
+    'few_shot_examples': 'FEW_SHOT_EXAMPLES',
+    'few_shot_template': 'FEW_SHOT_TEMPLATE',
+    
+    # CoT Settings
+    'cot_reasoning_steps': 'COT_REASONING_STEPS',
+    'cot_template': 'COT_TEMPLATE',
+    
+    
+    
+    # Output Settings
+    'results_dir': 'RESULTS_DIR',
+    'logs_dir': 'LOGS_DIR',
+    'sqlite_dbs_dir': 'SQLITE_DBS_DIR',
+    
+    # Evaluation Settings
+    'enable_execution_accuracy': 'ENABLE_EXECUTION_ACCURACY',
+    'enable_component_analysis': 'ENABLE_COMPONENT_ANALYSIS',
+    'enable_error_analysis': 'ENABLE_ERROR_ANALYSIS',
+    'evaluation_timeout': 'EVALUATION_TIMEOUT',
+    'strict_syntax_check': 'STRICT_SYNTAX_CHECK',
+    
+    # Logging Settings
+    'log_level': 'LOG_LEVEL',
+    'log_format': 'LOG_FORMAT',
+    'enable_request_logging': 'ENABLE_REQUEST_LOGGING',
+    'enable_response_logging': 'ENABLE_RESPONSE_LOGGING',
+    
+    # Performance Settings
+    'batch_size': 'BATCH_SIZE',
+    'max_concurrent_requests': 'MAX_CONCURRENT_REQUESTS',
+    'retry_attempts': 'RETRY_ATTEMPTS',
+    'retry_delay': 'RETRY_DELAY'
+}
+
+# Converters from environment variable strings, keyed by the field's current type
+_CONVERTERS = {
+    bool: lambda value: value.lower() in ('true', '1', 'yes', 'on'),
+    int: int,
+    float: float,
+}
+
+
 @dataclass
 class ViPERConfig:
     """
@@ -68,6 +137,7 @@ class ViPERConfig:
     enable_component_analysis: bool = field(default=True)
     enable_error_analysis: bool = field(default=True)
     evaluation_timeout: int = field(default=30)
+    strict_syntax_check: bool = field(default=False)
     
     # Logging Settings
     log_level: str = field(default="INFO")
@@ -81,6 +151,10 @@ class ViPERConfig:
     retry_attempts: int = field(default=3)
     retry_delay: int = field(default=1)
     
+    # Process-wide caches (class attributes, not dataclass fields)
+    _env_files_loaded = False
+    _created_directories = set()
+    
     def __init__(self, **kwargs):
         """Load configuration from environment after initialization."""
         # Set mặc định level = std nếu không truyền vào
@@ -95,100 +169,40 @@ class ViPERConfig:
     
     def _load_from_env(self):
         """Load configuration from environment variables and .env files."""
-        # Try to load from .env files in order of preference
-        env_files = [".env", "config.env", ".env.local"]
-        for env_file in env_files:
-            if Path(env_file).exists():
-                load_dotenv(env_file, override=False)
-                break
+        # Try to load from .env files in order of preference (once per process)
+        if not ViPERConfig._env_files_loaded:
+            env_files = [".env", "config.env", ".env.local"]
+            for env_file in env_files:
+                if Path(env_file).exists():
+                    load_dotenv(env_file, override=False)
+                    break
+            ViPERConfig._env_files_loaded = True
         
         # Load values from environment, keeping existing values if they were set in constructor
-        env_mapping = {
-            # API Keys
-            'openai_api_key': 'OPENAI_API_KEY',
-            'anthropic_api_key': 'ANTHROPIC_API_KEY', 
-            'langchain_api_key': 'LANGCHAIN_API_KEY',
-            'langchain_tracing': 'LANGCHAIN_TRACING_V2',
-            
-            # Model Settings
-            'model_name': 'DEFAULT_MODEL',
-            'temperature': 'DEFAULT_TEMPERATURE',
-            'max_tokens': 'DEFAULT_MAX_TOKENS',
-            'timeout': 'DEFAULT_TIMEOUT',
-            
-            # Dataset Settings
-            'dataset_path': 'DATASET_PATH',
-            'split': 'DEFAULT_SPLIT',
-            'level': 'DEFAULT_LEVEL', 
-            'samples': 'DEFAULT_SAMPLES',
-            
-            # Strategy Settings
-            'strategy': 'DEFAULT_STRATEGY',
-            'template_dir': 'DEFAULT_TEMPLATE_DIR',
-            'template_name': 'DEFAULT_TEMPLATE',
-            
-            # Few-shot Settings
-            'few_shot_examples': 'FEW_SHOT_EXAMPLES',
-            'few_shot_template': 'FEW_SHOT_TEMPLATE',
-            
-            # CoT Settings
-            'cot_reasoning_steps': 'COT_REASONING_STEPS',
-            'cot_template': 'COT_TEMPLATE',
-            
-            
-            
-            # Output Settings
-            'results_dir': 'RESULTS_DIR',
-            'logs_dir': 'LOGS_DIR',
-            'sqlite_dbs_dir': 'SQLITE_DBS_DIR',
-            
-            # Evaluation Settings
-            'enable_execution_accuracy': 'ENABLE_EXECUTION_ACCURACY',
-            'enable_component_analysis': 'ENABLE_COMPONENT_ANALYSIS',
-            'enable_error_analysis': 'ENABLE_ERROR_ANALYSIS',
-            'evaluation_timeout': 'EVALUATION_TIMEOUT',
-            
-            # Logging Settings
-            'log_level': 'LOG_LEVEL',
-            'log_format': 'LOG_FORMAT',
-            'enable_request_logging': 'ENABLE_REQUEST_LOGGING',
-            'enable_response_logging': 'ENABLE_RESPONSE_LOGGING',
-            
-            # Performance Settings
-            'batch_size': 'BATCH_SIZE',
-            'max_concurrent_requests': 'MAX_CONCURRENT_REQUESTS',
-            'retry_attempts': 'RETRY_ATTEMPTS',
-            'retry_delay': 'RETRY_DELAY'
-        }
-        
-        for attr_name, env_name in env_mapping.items():
+        env = os.environ
+        for attr_name, env_name in _ENV_MAPPING.items():
+            env_value = env.get(env_name)
+            if env_value is None:
+                continue
             # Only update if the current value is the default (not set in constructor)
             current_value = getattr(self, attr_name)
             if self._is_default_value(attr_name, current_value):
-                env_value = os.getenv(env_name)
-                if env_value is not None:
-                    # Convert to appropriate type
-                    converted_value = self._convert_env_value(env_value, type(current_value))
-                    setattr(self, attr_name, converted_value)
+                # Convert to appropriate type
+                converted_value = self._convert_env_value(env_value, type(current_value))
+                setattr(self, attr_name, converted_value)
     
     def _is_default_value(self, attr_name: str, current_value: Any) -> bool:
         """Check if current value is the default value."""
         # Get the default value from the field definition
-        for field_info in self.__dataclass_fields__.values():
-            if field_info.name == attr_name:
-                return current_value == field_info.default
-        return False
+        field_info = self.__dataclass_fields__.get(attr_name)
+        if field_info is None:
+            return False
+        return current_value == field_info.default
     
     def _convert_env_value(self, value: str, target_type: type) -> Any:
         """Convert environment variable string to target type."""
-        if target_type == bool:
-            return value.lower() in ('true', '1', 'yes', 'on')
-        elif target_type == int:
-            return int(value)
-        elif target_type == float:
-            return float(value)
-        else:
-            return value
+        converter = _CONVERTERS.get(target_type)
+        return converter(value) if converter is not None else value
     
     def _validate_config(self):
         """Validate configuration values."""
@@ -218,7 +232,10 @@ class ViPERConfig:
         """Create necessary directories."""
         directories = [self.results_dir, self.logs_dir, self.template_dir]
         for directory in directories:
+            if directory in ViPERConfig._created_directories:
+                continue
             Path(directory).mkdir(parents=True, exist_ok=True)
+            ViPERConfig._created_directories.add(directory)
     
     @property
     def template_path(self) -> str:
@@ -252,9 +269,15 @@ class ViPERConfig:
     
     def update(self, **kwargs) -> 'ViPERConfig':
         """Create new config with updated values."""
-        current_dict = self.to_dict()
-        current_dict.update(kwargs)
-        return ViPERConfig(**current_dict)
+        # Copy instead of re-running __init__: environment values are already
+        # applied, only the changed fields need validating
+        new_config = copy.copy(self)
+        for field_name, value in kwargs.items():
+            if field_name in self.__dataclass_fields__:
+                setattr(new_config, field_name, value)
+        new_config._validate_config()
+        new_config._setup_directories()
+        return new_config
     
     def __str__(self) -> str:
         """String representation for logging."""
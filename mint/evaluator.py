@@ -4,10 +4,89 @@ Unified Evaluator for ViPERSQL
 Provides evaluation functionality for all strategies.
 """
 
-from typing import Dict, Any, List
+from dataclasses import dataclass, field, asdict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
 from .config import ViPERConfig
 from .metrics import EvaluationMetrics
 import re
+import sys
+import sqlparse
+
+try:
+    import regex as _regex
+except ImportError:  # regex is optional, fall back to the stdlib engine
+    _regex = re
+
+# Chuỗi khoảng trắng liên tiếp
+_WS_RE = re.compile(r'\s+')
+
+# Câu SQL hợp lệ phải bắt đầu bằng một lệnh SQL
+_SQL_VERB_RE = re.compile(r'^\s*(select|insert|update|delete|with)\b', re.IGNORECASE)
+
+# Các hàm SQL cần chuẩn hóa: function ( ... ) -> function(...)
+# Module regex (nếu có) nhanh hơn re khoảng 3 lần với pattern này; các pattern khác thì không
+_FUNC_RE = _regex.compile(r'(count_distinct|count|min|max|sum|avg)\s*\(\s*([^)]+?)\s*\)', _regex.IGNORECASE)
+
+# Từ khóa mệnh đề SQL cho extract_sql_clauses (một lần quét); UNION/INTERSECT/EXCEPT
+# ở mức ngoài cùng kết thúc câu SELECT đầu tiên. Lookahead theo chữ cái đầu loại
+# nhanh các từ không thể là từ khóa trước khi thử cả nhóm alternation
+_CLAUSE_KEYWORD_RE = re.compile(
+    r'\b(?=[SFWGOHUIE])(SELECT|FROM|WHERE|GROUP\s+BY|ORDER\s+BY|HAVING|UNION|INTERSECT|EXCEPT)\b',
+    re.IGNORECASE
+)
+_SET_OPERATORS = frozenset(('UNION', 'INTERSECT', 'EXCEPT'))
+# Chuỗi trong dấu nháy đơn/kép (nháy lặp '' là escape), để bỏ qua ngoặc/từ khóa bên trong
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+
+
+def _normalize_exact(sql: str) -> str:
+    """Normalize SQL for exact-match comparison (collapse whitespace, lowercase)."""
+    return _WS_RE.sub(' ', sql).strip().lower()
+
+
+def _lexically_valid(sql: str) -> bool:
+    """Cheap syntax check: starts with an SQL verb and has balanced parentheses."""
+    return bool(sql) and _SQL_VERB_RE.match(sql) is not None and sql.count('(') == sql.count(')')
+
+
+@lru_cache(maxsize=8192)
+def _syntax_valid(sql: str) -> bool:
+    """Full sqlparse check (no error tokens), cached because predictions often repeat."""
+    try:
+        parsed = sqlparse.parse(sql)
+        return len(parsed) > 0 and not any(
+            token.ttype is sqlparse.tokens.Error
+            for token in parsed[0].flatten()
+        )
+    except Exception:
+        return False
+
+
+# dataclass(slots=True) chỉ có từ Python 3.10; bản cũ hơn dùng dataclass thường
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
+class EvalResult:
+    """Evaluation result for one prediction."""
+    exact_match: bool
+    syntax_valid: bool
+    request_id: str
+    component_f1_scores: Dict[str, float] = field(default_factory=dict)
+    details: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    execution_accuracy: Optional[bool] = None
+    # SQL sau chuẩn hóa, calculate_summary dùng lại thay vì SQL gốc
+    normalized_predicted_sql: Optional[str] = None
+    normalized_gold_sql: Optional[str] = None
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access for callers written against the old dict results."""
+        return getattr(self, key, default)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dict (e.g. for JSON output)."""
+        return asdict(self)
 
 
 class UnifiedEvaluator:
@@ -17,6 +96,10 @@ class UnifiedEvaluator:
         """Initialize evaluator with configuration."""
         self.config = config
         self.metrics = EvaluationMetrics()
+        # Full sqlparse validation is opt-in, the lexical check is enough by default
+        self._strict_syntax_check = getattr(config, 'strict_syntax_check', False)
+        # Resolve the schema path once; metrics cache the parsed tables.json per path
+        self._schema_path = getattr(config, 'schema_path', 'dataset/ViText2SQL/std-level/tables.json')
     
     def evaluate_single(
         self,
@@ -25,28 +108,61 @@ class UnifiedEvaluator:
         db_id: str,
         request_id: str,
         schema_path: str = None
-    ) -> Dict[str, Any]:
-        """Evaluate a single prediction."""
+    ) -> EvalResult:
+        """Evaluate a single prediction (thin wrapper over evaluate_batch)."""
+        return self.evaluate_batch([predicted_sql], [gold_sql], [db_id], [request_id], schema_path)[0]
+    
+    def evaluate_batch(
+        self,
+        predicted_sqls: List[str],
+        gold_sqls: List[str],
+        db_ids: List[str],
+        request_ids: List[str],
+        schema_path: str = None
+    ) -> List[EvalResult]:
+        """
+        Evaluate a batch of predictions.
+        
+        Per-sample component F1 is computed with a single metrics call, so
+        schema loading and setup are paid once per batch instead of per sample.
+        """
         # Chuẩn hóa predicted_sql trước khi evaluation
-        predicted_sql = self.normalize_sql_query(predicted_sql)
-        predicted_sql = self.normalize_sql_functions(predicted_sql)
+        predicted_sqls = [
+            self.normalize_sql_functions(self.normalize_sql_query(sql))
+            for sql in predicted_sqls
+        ]
         
         # Chuẩn hóa gold_sql
-        gold_sql = self.normalize_sql_functions(gold_sql)
+        gold_sqls = [self.normalize_sql_functions(sql) for sql in gold_sqls]
         
-        # Basic evaluation
-        exact_match = self._exact_match(predicted_sql, gold_sql)
-        syntax_valid = self._validate_syntax(predicted_sql)
+        # Component-wise F1 for each query
+        if schema_path is None:
+            schema_path = self._schema_path
+        component_f1_list = self.metrics.per_query_component_f1_scores(predicted_sqls, gold_sqls, db_ids, schema_path)
+        
+        return [
+            self._build_result(predicted_sql, gold_sql, component_f1, request_id)
+            for predicted_sql, gold_sql, component_f1, request_id
+            in zip(predicted_sqls, gold_sqls, component_f1_list, request_ids)
+        ]
+    
+    def _build_result(
+        self,
+        predicted_sql: str,
+        gold_sql: str,
+        component_f1: Dict[str, float],
+        request_id: str
+    ) -> EvalResult:
+        """Build the evaluation result for one normalized prediction."""
+        # Basic evaluation. predicted_sql đã được chuẩn hóa khoảng trắng
+        # (normalize_sql_query), chỉ cần chuẩn hóa gold một lần
+        exact_match = predicted_sql.lower() == _normalize_exact(gold_sql)
+        syntax_valid = self._check_syntax(predicted_sql)
         
         # Extract SQL clauses for detailed analysis
         predicted_clauses = self.extract_sql_clauses(predicted_sql)
         gold_clauses = self.extract_sql_clauses(gold_sql)
         
-        # Component-wise F1e for single query
-        if schema_path is None:
-            schema_path = self.config.schema_path if hasattr(self.config, 'schema_path') else 'dataset/ViText2SQL/std-level/tables.json'
-        component_f1 = self.metrics.component_wise_f1_score([predicted_sql], [gold_sql], [db_id], schema_path)
-        
         # Create details object
         details = {}
         for clause in ['SELECT', 'FROM', 'WHERE', 'GROUP BY', 'ORDER BY', 'HAVING']:
@@ -65,14 +181,15 @@ class UnifiedEvaluator:
                 'score': score
             }
         
-        result = {
-            'exact_match': exact_match,
-            'syntax_valid': syntax_valid,
-            'component_f1_scores': component_f1,
-            'details': details,
-            'request_id': request_id
-        }
-        return result
+        return EvalResult(
+            exact_match=exact_match,
+            syntax_valid=syntax_valid,
+            request_id=request_id,
+            component_f1_scores=component_f1,
+            details=details,
+            normalized_predicted_sql=predicted_sql,
+            normalized_gold_sql=gold_sql
+        )
 
     def normalize_sql_query(self, sql_query: str) -> str:
         """
@@ -83,16 +200,9 @@ class UnifiedEvaluator:
         if not sql_query:
             return sql_query
         
-        # 1. Replace \n thành khoảng trắng
-        sql_query = sql_query.replace('\n', ' ')
-        
-        # 2. Replace nhiều khoảng trắng thành 1 khoảng trắng
-        sql_query = re.sub(r'\s+', ' ', sql_query)
-        
-        # 3. Trim khoảng trắng đầu cuối
-        sql_query = sql_query.strip()
-        
-        return sql_query
+        # split() không đối số tách theo mọi chuỗi khoảng trắng (kể cả \n) và bỏ
+        # khoảng trắng đầu cuối: thay \n, gộp khoảng trắng và trim trong một lần
+        return ' '.join(sql_query.split())
 
     def normalize_sql_functions(self, sql_query: str) -> str:
         """
@@ -103,58 +213,51 @@ class UnifiedEvaluator:
         if not sql_query:
             return sql_query
         
-        # Danh sách các hàm SQL cần chuẩn hóa
-        sql_functions = [
-            'COUNT', 'MIN', 'MAX', 'SUM', 'AVG', 'COUNT_DISTINCT',
-            'count', 'min', 'max', 'sum', 'avg', 'count_distinct'
-        ]
-        
-        # Chuẩn hóa từng hàm
-        for func in sql_functions:
-            # Pattern: function ( ... ) -> function(...)
-            # Xử lý cả trường hợp có khoảng trắng và không có
-            patterns = [
-                rf'{func}\s*\(\s*([^)]+)\s*\)',  # function ( ... )
-                rf'{func}\s*\(\s*([^)]+)\s*\)',  # function(...)
-            ]
-            
-            for pattern in patterns:
-                matches = re.finditer(pattern, sql_query, re.IGNORECASE)
-                for match in reversed(list(matches)):  # Xử lý từ cuối để không ảnh hưởng index
-                    full_match = match.group(0)
-                    content = match.group(1).strip()
-                    # Tạo lại với format chuẩn: function(content)
-                    replacement = f"{func}({content})"
-                    sql_query = sql_query[:match.start()] + replacement + sql_query[match.end():]
-        
-        return sql_query
+        # Một lần quét cho tất cả các hàm; tên hàm được viết thường
+        return _FUNC_RE.sub(
+            lambda match: f"{match.group(1).lower()}({match.group(2).strip()})",
+            sql_query
+        )
     
     def calculate_summary(self, results: List[Dict[str, Any]], schema_path: str = None) -> Dict[str, Any]:
         """Calculate summary statistics."""
         if not results:
             return {'total_samples': 0}
-        valid_results = [r for r in results if 'error' not in r]
-        total = len(valid_results)
+        # Filter errors, count basic metrics and collect component F1 inputs in one pass
+        exact_matches = syntax_valid = 0
+        predicted_queries = []
+        gold_queries = []
+        db_ids = []
+        for r in results:
+            if 'error' in r:
+                continue
+            evaluation = r.get('evaluation', {})
+            if isinstance(evaluation, EvalResult):
+                exact_matches += evaluation.exact_match
+                syntax_valid += evaluation.syntax_valid
+                predicted_sql = evaluation.normalized_predicted_sql
+                gold_sql = evaluation.normalized_gold_sql
+            else:
+                # Kết quả dạng dict (ví dụ đọc lại từ file kết quả cũ)
+                if evaluation.get('exact_match', False):
+                    exact_matches += 1
+                if evaluation.get('syntax_valid', False):
+                    syntax_valid += 1
+                predicted_sql = evaluation.get('normalized_predicted_sql')
+                gold_sql = evaluation.get('normalized_gold_sql')
+            # SQL đã chuẩn hóa khi evaluate; file kết quả cũ không có thì dùng SQL gốc
+            predicted_queries.append(r['predicted_sql'] if predicted_sql is None else predicted_sql)
+            gold_queries.append(r['gold_sql'] if gold_sql is None else gold_sql)
+            db_ids.append(r['db_id'])
+        total = len(predicted_queries)
         if total == 0:
             return {
                 'total_samples': len(results),
                 'errors': len(results)
             }
-        # Calculate basic metrics
-        exact_matches = sum(
-            1 for r in valid_results 
-            if r.get('evaluation', {}).get('exact_match', False)
-        )
-        syntax_valid = sum(
-            1 for r in valid_results
-            if r.get('evaluation', {}).get('syntax_valid', False)
-        )
         # Component F1-score
-        predicted_queries = [r['predicted_sql'] for r in valid_results]
-        gold_queries = [r['gold_sql'] for r in valid_results]
-        db_ids = [r['db_id'] for r in valid_results]
         if schema_path is None:
-            schema_path = self.config.schema_path if hasattr(self.config, 'schema_path') else 'dataset/ViText2SQL/std-level/tables.json'
+            schema_path = self._schema_path
         component_f1_scores = self.metrics.component_wise_f1_score(predicted_queries, gold_queries, db_ids, schema_path)
         # Calculate average F1 across all components
         avg_component_f1 = sum(component_f1_scores.values()) / len(component_f1_scores) if component_f1_scores else 0.0  
@@ -171,54 +274,55 @@ class UnifiedEvaluator:
     
     def _exact_match(self, predicted: str, gold: str) -> bool:
         """Check exact match after normalization."""
-        def normalize(sql):
-            sql = sql.strip().lower()
-            sql = ' '.join(sql.split())
-            return sql
-        
-        return normalize(predicted) == normalize(gold)
+        return _normalize_exact(predicted) == _normalize_exact(gold)
     
     def _validate_syntax(self, sql: str) -> bool:
         """Validate SQL syntax."""
-        try:
-            import sqlparse
-            parsed = sqlparse.parse(sql)
-            return len(parsed) > 0
-        except:
-            return False 
+        # Whitespace variants of the same query share one cache entry
+        sql = _WS_RE.sub(' ', sql).strip() if sql else ''
+        return self._check_syntax(sql)
+    
+    def _check_syntax(self, sql: str) -> bool:
+        """Validate whitespace-normalized SQL (lexical check, plus sqlparse if strict)."""
+        if not _lexically_valid(sql):
+            return False
+        return _syntax_valid(sql) if self._strict_syntax_check else True
 
     def extract_sql_clauses(self, sql_query: str) -> Dict[str, str]:
-        """Extract SQL clauses for detailed analysis."""
-        clauses = {}
-        
-        # SELECT clause
-        select_match = re.search(r'SELECT\s+(.*?)\s+FROM', sql_query, re.IGNORECASE | re.DOTALL)
-        if select_match:
-            clauses['SELECT'] = select_match.group(1).strip()
-        
-        # FROM clause
-        from_match = re.search(r'FROM\s+(.*?)(?:\s+WHERE|\s+GROUP|\s+ORDER|\s+HAVING|$)', sql_query, re.IGNORECASE | re.DOTALL)
-        if from_match:
-            clauses['FROM'] = from_match.group(1).strip()
-        
-        # WHERE clause
-        where_match = re.search(r'WHERE\s+(.*?)(?:\s+GROUP|\s+ORDER|\s+HAVING|$)', sql_query, re.IGNORECASE | re.DOTALL)
-        if where_match:
-            clauses['WHERE'] = where_match.group(1).strip()
-        
-        # GROUP BY clause
-        group_match = re.search(r'GROUP\s+BY\s+(.*?)(?:\s+ORDER|\s+HAVING|$)', sql_query, re.IGNORECASE | re.DOTALL)
-        if group_match:
-            clauses['GROUP BY'] = group_match.group(1).strip()
-        
-        # ORDER BY clause
-        order_match = re.search(r'ORDER\s+BY\s+(.*?)(?:\s+HAVING|$)', sql_query, re.IGNORECASE | re.DOTALL)
-        if order_match:
-            clauses['ORDER BY'] = order_match.group(1).strip()
-        
-        # HAVING clause
-        having_match = re.search(r'HAVING\s+(.*?)$', sql_query, re.IGNORECASE | re.DOTALL)
-        if having_match:
-            clauses['HAVING'] = having_match.group(1).strip()
+        """
+        Extract SQL clauses for detailed analysis.
         
-        return clauses 
\ No newline at end of file
+        Single left-to-right scan over clause keywords; keywords inside
+        parentheses (subqueries) or string literals are skipped and each
+        clause runs up to the next top-level keyword. Only the first SELECT
+        of a compound query (UNION/INTERSECT/EXCEPT) is split into clauses.
+        """
+        clauses = {}
+        # Quét trên bản sao đã che string literal bằng khoảng trắng (giữ nguyên vị trí),
+        # cắt mệnh đề từ câu gốc
+        scan = sql_query
+        if "'" in scan or '"' in scan:
+            scan = _STRING_LITERAL_RE.sub(lambda m: ' ' * len(m.group()), scan)
+        # Phần lớn câu truy vấn không có ngoặc: bỏ qua việc đếm độ sâu
+        has_parens = '(' in scan or ')' in scan
+        depth = 0
+        pos = 0
+        current = None
+        start = 0
+        for match in _CLAUSE_KEYWORD_RE.finditer(scan):
+            keyword_start = match.start()
+            if has_parens:
+                depth += scan.count('(', pos, keyword_start) - scan.count(')', pos, keyword_start)
+                pos = keyword_start
+                if depth > 0:
+                    continue
+            if current is not None and current not in clauses:
+                clauses[current] = sql_query[start:keyword_start].strip()
+            # GROUP  BY -> GROUP BY
+            current = ' '.join(match.group(1).upper().split())
+            if current in _SET_OPERATORS:
+                return clauses
+            start = match.end()
+        if current is not None and current not in clauses:
+            clauses[current] = sql_query[start:].strip()
+        return clauses
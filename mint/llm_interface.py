@@ -5,12 +5,13 @@ Provides unified interface for different LLM providers (OpenAI, Anthropic).
 """
 
 import time
-from typing import Dict, Any, Optional
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
+from typing import Dict, Any, List, Optional
 from .config import ViPERConfig
 import re
 
+# Dòng câu hỏi trong prompt ('Question: ...')
+_QUESTION_RE = re.compile(r'(Question:\s*)(.*)')
+
 
 class LLMInterface:
     """Unified interface for LLM providers."""
@@ -24,7 +25,9 @@ class LLMInterface:
         """Initialize the appropriate LLM based on model name."""
         model_name = self.config.model_name.lower()
         
+        # Provider SDKs are heavy; import only the one that is actually used
         if 'gpt' in model_name:
+            from langchain_openai import ChatOpenAI
             return ChatOpenAI(
                 model=self.config.model_name,
                 temperature=self.config.temperature,
@@ -32,6 +35,7 @@ class LLMInterface:
                 openai_api_key=self.config.openai_api_key
             )
         elif 'claude' in model_name:
+            from langchain_anthropic import ChatAnthropic
             return ChatAnthropic(
                 model=self.config.model_name,
                 temperature=self.config.temperature,
@@ -41,19 +45,50 @@ class LLMInterface:
         else:
             raise ValueError(f"Unsupported model: {self.config.model_name}")
     
-    def generate(self, prompt: str, model: str, temperature: float = 0.7, max_tokens: int = 512) -> str:
-        """Generate response from LLM."""
-        # Nếu prompt có trường question, replace _ thành space
-        def replace_underscore_question(text):
-            # Tìm dòng bắt đầu bằng 'Question:' và thay _ thành space
-            return re.sub(r'(Question:\s*)(.*)', lambda m: m.group(1) + m.group(2).replace('_', ' '), text)
-        prompt = replace_underscore_question(prompt)
+    def _prepare_prompt(self, prompt: str) -> str:
+        """Nếu prompt có trường question, replace _ thành space."""
+        if 'Question:' in prompt:
+            return _QUESTION_RE.sub(lambda m: m.group(1) + m.group(2).replace('_', ' '), prompt)
+        return prompt
+    
+    def generate(self, prompt: str, **kwargs) -> str:
+        """
+        Generate response from LLM.
+        
+        Sampling settings come from the config the LLM was built with; keyword
+        arguments such as model/temperature/max_tokens are accepted for
+        compatibility with existing callers.
+        """
+        prompt = self._prepare_prompt(prompt)
         try:
             response = self.llm.invoke(prompt)
             return response.content
         except Exception as e:
             raise RuntimeError(f"LLM generation failed: {str(e)}")
     
+    def generate_batch(self, prompts: List[str], max_concurrency: Optional[int] = None) -> List[str]:
+        """
+        Generate responses for several prompts concurrently (overlaps network latency).
+        Concurrency defaults to config.max_concurrent_requests.
+        """
+        if max_concurrency is None:
+            max_concurrency = self.config.max_concurrent_requests
+        prompts = [self._prepare_prompt(prompt) for prompt in prompts]
+        try:
+            responses = self.llm.batch(prompts, config={"max_concurrency": max(1, max_concurrency)})
+            return [response.content for response in responses]
+        except Exception as e:
+            raise RuntimeError(f"LLM batch generation failed: {str(e)}")
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """Async version of generate, for callers that gather many prompts."""
+        prompt = self._prepare_prompt(prompt)
+        try:
+            response = await self.llm.ainvoke(prompt)
+            return response.content
+        except Exception as e:
+            raise RuntimeError(f"LLM generation failed: {str(e)}")
+    
     def generate_with_metadata(self, prompt: str, **kwargs) -> Dict[str, Any]:
         """Generate response with timing and metadata."""
         start_time = time.time()
@@ -3,16 +3,115 @@ Evaluation Metrics module for MINT package.
 Provides comprehensive evaluation metrics for Text-to-SQL models.
 """
 
+import os
 import re
 import json
 import sqlparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from difflib import SequenceMatcher
 from collections import defaultdict
+from functools import lru_cache
 from .utils import normalize_sql, load_dataset
 import unicodedata
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib parser
+    orjson = None
+
+try:
+    from rapidfuzz import fuzz as _rapidfuzz_fuzz
+except ImportError:  # rapidfuzz is optional, only needed for similarity='rapidfuzz'
+    _rapidfuzz_fuzz = None
+
+# Các mệnh đề được chấm điểm F1 theo component
+_F1_CLAUSES = ('SELECT', 'FROM', 'WHERE', 'GROUP BY', 'ORDER BY', 'HAVING', 'KEYWORDS')
+
+# Pattern tách mệnh đề, dùng chung cho _extract_sql_components và extract_components_as_sets
+_CLAUSE_PATTERNS = {
+    'SELECT': r'SELECT\s+(.*?)\s+FROM',
+    'FROM': r'FROM\s+(.*?)(?:\s+WHERE|\s+GROUP|\s+ORDER|\s+HAVING|$)',
+    'WHERE': r'WHERE\s+(.*?)(?:\s+GROUP|\s+ORDER|\s+HAVING|$)',
+    'GROUP BY': r'GROUP\s+BY\s+(.*?)(?:\s+ORDER|\s+HAVING|$)',
+    'ORDER BY': r'ORDER\s+BY\s+(.*?)(?:\s+HAVING|$)',
+    'HAVING': r'HAVING\s+(.*?)$',
+}
+# _extract_sql_components chạy trên query đã upper()
+_UPPER_CLAUSE_RES = {clause: re.compile(pattern, re.DOTALL) for clause, pattern in _CLAUSE_PATTERNS.items()}
+# extract_components_as_sets không phân biệt hoa thường
+_CLAUSE_RES = {
+    clause: re.compile(pattern, re.DOTALL | re.IGNORECASE)
+    for clause, pattern in _CLAUSE_PATTERNS.items()
+}
+
+# Common SQL keywords cho _extract_keywords (so khớp chuỗi con trên query đã upper())
+_SQL_KEYWORDS = (
+    'SELECT', 'FROM', 'WHERE', 'GROUP BY', 'ORDER BY', 'HAVING',
+    'JOIN', 'LEFT JOIN', 'RIGHT JOIN', 'INNER JOIN', 'OUTER JOIN',
+    'UNION', 'INTERSECT', 'EXCEPT', 'WITH', 'DISTINCT',
+    'COUNT', 'SUM', 'AVG', 'MAX', 'MIN', 'CASE', 'WHEN', 'THEN', 'END',
+    'AND', 'OR', 'NOT', 'IN', 'EXISTS', 'LIKE', 'BETWEEN', 'IS NULL', 'NULL',
+    'ASC', 'DESC', 'LIMIT', 'OFFSET'
+)
+
+_AND_OR_SPLIT_RE = re.compile(r'\b(?:AND|OR)\b', re.IGNORECASE)
+_JOIN_SPLIT_RE = re.compile(r'\b(?:JOIN|LEFT JOIN|RIGHT JOIN|INNER JOIN|OUTER JOIN)\b', re.IGNORECASE)
+_QUALIFIER_RE = re.compile(r'\b(\w+)\.')
+_ALIAS_COLUMN_RE = re.compile(r'(\w+)\.(\w+)')
+_FROM_JOIN_ALIAS_RE = re.compile(r'(FROM|JOIN)\s+([\w\s]+?)(?:\s+AS)?\s+(\w+)', re.IGNORECASE)
+_FROM_JOIN_TABLE_RE = re.compile(r'(FROM|JOIN)\s+([\w\s]+?)(?:\s+AS\s+\w+)?', re.IGNORECASE)
+_LIKE_RE = re.compile(r'\bLIKE\b', re.IGNORECASE)
+_QUOTED_VALUE_RE = re.compile(r'([\'"])([^\'"]*)\1')
+_FUNC_ARG_RE = re.compile(r'\(([^)]+)\)')
+_WHERE_COND_RE = re.compile(r'(\w+)(?:\.(\w+))?\s*[=<>!]+\s*')
+_HAVING_COND_RE = re.compile(r'(\w+(?:\.\w+)?)\s*[=<>!]+\s*')
+_ASC_DESC_RE = re.compile(r'(?:ASC|DESC)\b', re.IGNORECASE)
+
+
+def _split_and_or(clause: str) -> List[str]:
+    """
+    Tách điều kiện theo AND/OR (như _AND_OR_SPLIT_RE.split).
+    Phần lớn mệnh đề chỉ có một điều kiện: không có chuỗi AND/OR thì bỏ qua regex.
+    Ký tự khớp A/N/D/O/R khi IGNORECASE đều upper() về đúng chữ đó nên phép kiểm tra là chính xác.
+    """
+    clause_upper = clause.upper()
+    if 'AND' not in clause_upper and 'OR' not in clause_upper:
+        return [clause]
+    return _AND_OR_SPLIT_RE.split(clause)
+
+# Đặc trưng cho SQLDifficultyClassifier (chạy trên query đã upper()), một lần quét cho tất cả.
+# Các đặc trưng là những từ riêng biệt nên không có match nào che mất match khác;
+# lookahead theo chữ cái đầu loại nhanh các từ còn lại
+_DIFFICULTY_FEATURES_RE = re.compile(
+    r'\b(?=[JUIEOWGH])(?:'
+    r'(?P<join>JOIN\b)|(?P<union>UNION\b)|(?P<intersect>INTERSECT\b)|(?P<except>EXCEPT\b)'
+    r'|(?P<window>OVER\s*\()|(?P<cte>WITH\b)|(?P<group_by>GROUP\s+BY\b)|(?P<order_by>ORDER\s+BY\b)'
+    r'|(?P<having>HAVING\b)|(?P<where>WHERE\b))'
+)
+
+
+def _ngrams(s: str, n: int = 4) -> frozenset:
+    """Character n-grams of s; a string shorter than n is its own single gram."""
+    return frozenset(s[i:i + n] for i in range(max(len(s) - n + 1, 1)))
+
+
+@lru_cache(maxsize=8)
+def _load_schemas(schema_path: str) -> Dict[str, dict]:
+    """Parse tables.json once per path into a db_id -> schema map."""
+    if orjson is not None:
+        schemas = orjson.loads(Path(schema_path).read_bytes())
+    else:
+        with open(schema_path, 'r', encoding='utf-8') as f:
+            schemas = json.load(f)
+    schema_map = {}
+    for schema in schemas:
+        # Giữ schema đầu tiên nếu db_id bị trùng
+        schema_map.setdefault(schema['db_id'], schema)
+    return schema_map
+
+
 class EvaluationMetrics:
     """
     A comprehensive evaluation metrics calculator for Text-to-SQL models.
@@ -21,9 +120,70 @@ class EvaluationMetrics:
     SQL similarity, and difficulty-based analysis.
     """
     
-    def __init__(self):
-        """Initialize EvaluationMetrics."""
+    def __init__(self, similarity: str = 'difflib'):
+        """
+        Initialize EvaluationMetrics.
+        
+        Args:
+            similarity (str): String similarity used by sql_similarity and the difficulty
+                breakdown: 'difflib' (SequenceMatcher ratio, default), 'rapidfuzz'
+                (Indel ratio from rapidfuzz, much faster but scores differ slightly) or
+                'ngram' (Jaccard of character 4-gram sets, no dependency, scores differ)
+        """
+        if similarity not in ('difflib', 'rapidfuzz', 'ngram'):
+            raise ValueError(f"Invalid similarity: {similarity}. Must be one of ['difflib', 'rapidfuzz', 'ngram']")
+        if similarity == 'rapidfuzz' and _rapidfuzz_fuzz is None:
+            raise ValueError("similarity='rapidfuzz' requires the rapidfuzz package (pip install rapidfuzz)")
+        self.similarity = similarity
         self.difficulty_classifier = SQLDifficultyClassifier()
+        # tables.json path -> {db_id: (tables, columns)}, reused across calls
+        self._schema_sets_cache = {}
+        # Kết quả xử lý của danh sách gold / predicted gần nhất, dùng lại giữa các metric
+        self._gold_cache = {}
+        self._pred_cache = {}
+    
+    @staticmethod
+    def _query_features(cache: dict, queries: List[str]) -> Dict[str, Any]:
+        """
+        Per-list results (normalized SQL, upper(), difficulty, component sets)
+        shared by metric calls on the same query list. Keyed on the list's
+        contents rather than id(), so a new or mutated list is recomputed.
+        Only the most recent list is kept.
+        """
+        try:
+            key = tuple(queries)
+            features = cache.get(key)
+        except TypeError:
+            # Phần tử không hash được: không cache
+            return {}
+        if features is None:
+            cache.clear()
+            features = cache[key] = {}
+        return features
+    
+    def _cached_norms(self, cache: dict, queries: List[str]) -> List[str]:
+        """normalize_sql of each query, memoized per query list."""
+        features = self._query_features(cache, queries)
+        if 'norms' not in features:
+            features['norms'] = [normalize_sql(query) for query in queries]
+        return features['norms']
+    
+    def _cached_uppers(self, cache: dict, queries: List[str]) -> List[str]:
+        """upper() of each query, memoized per query list."""
+        features = self._query_features(cache, queries)
+        if 'uppers' not in features:
+            features['uppers'] = [query.upper() for query in queries]
+        return features['uppers']
+    
+    def _gold_difficulties(self, gold_queries: List[str]) -> List[str]:
+        """Difficulty label of each gold query, memoized per gold list."""
+        features = self._query_features(self._gold_cache, gold_queries)
+        if 'difficulties' not in features:
+            features['difficulties'] = [
+                self.difficulty_classifier.classify_query(gold, gold_upper)
+                for gold, gold_upper in zip(gold_queries, self._cached_uppers(self._gold_cache, gold_queries))
+            ]
+        return features['difficulties']
     
     def exact_match_accuracy(self, predicted_queries: List[str], gold_queries: List[str]) -> float:
         """
@@ -42,16 +202,22 @@ class EvaluationMetrics:
         if not predicted_queries:
             return 0.0
         
+        gold_norms = self._cached_norms(self._gold_cache, gold_queries)
         exact_matches = 0
-        for pred, gold in zip(predicted_queries, gold_queries):
-            pred_normalized = normalize_sql(pred)
-            gold_normalized = normalize_sql(gold)
-            
-            if pred_normalized == gold_normalized:
+        for pred, gold, gold_norm in zip(predicted_queries, gold_queries, gold_norms):
+            # Chuỗi gốc trùng nhau thì dạng chuẩn hóa cũng trùng, khỏi parse bằng sqlparse
+            if pred == gold or normalize_sql(pred) == gold_norm:
                 exact_matches += 1
-        
         return exact_matches / len(predicted_queries)
     
+    @staticmethod
+    def _exact_match_from_norms(pred_norms: List[str], gold_norms: List[str]) -> float:
+        """Exact match accuracy from queries already passed through normalize_sql."""
+        if not pred_norms:
+            return 0.0
+        exact_matches = sum(1 for pred, gold in zip(pred_norms, gold_norms) if pred == gold)
+        return exact_matches / len(pred_norms)
+    
     def component_wise_f1_score(self, predicted_queries: List[str], gold_queries: List[str], db_ids: List[str], schema_path: str) -> Dict[str, float]:
         """
         Calculate F1-score for SQL clauses using set-based component matching, schema-aware.
@@ -59,74 +225,84 @@ class EvaluationMetrics:
             predicted_queries (List[str]): List of predicted SQL queries
             gold_queries (List[str]): List of gold/reference SQL queries
             db_ids (List[str]): List of db_id for each query
-            schema_path (str): Path to tables.json
+            schema_path (str): Path to tables.json (or a parsed db_id -> schema mapping)
         Returns:
             Dict[str, float]: F1-score for each SQL clause
         """
         if len(predicted_queries) != len(gold_queries) or len(predicted_queries) != len(db_ids):
             raise ValueError("Predicted, gold query lists, and db_ids must have the same length")
-        clauses = ['SELECT', 'FROM', 'WHERE', 'GROUP BY', 'ORDER BY', 'HAVING', 'KEYWORDS']
-        clause_stats = {clause: {'tp': 0, 'fp': 0, 'fn': 0} for clause in clauses}
-        for pred, gold, db_id in zip(predicted_queries, gold_queries, db_ids):
-            schema = self.load_schema(db_id, schema_path)
-            schema_tables, schema_columns = self.get_table_and_column_sets(schema)
-            pred_components = self.extract_components_as_sets(pred, schema_tables, schema_columns)
-            gold_components = self.extract_components_as_sets(gold, schema_tables, schema_columns)
-            for clause in clauses:
-                pred_set = pred_components.get(clause, set())
-                gold_set = gold_components.get(clause, set())
-                
-                # Nếu cả predicted và gold đều rỗng, coi như perfect match
-                if len(pred_set) == 0 and len(gold_set) == 0:
-                    clause_stats[clause]['tp'] += 1
-                    clause_stats[clause]['fp'] += 0
-                    clause_stats[clause]['fn'] += 0
-                else:
-                    tp = len(pred_set & gold_set)
-                    fp = len(pred_set - gold_set)
-                    fn = len(gold_set - pred_set)
-                    clause_stats[clause]['tp'] += tp
-                    clause_stats[clause]['fp'] += fp
-                    clause_stats[clause]['fn'] += fn
-        f1_scores = {}
-        for clause in clauses:
-            tp = clause_stats[clause]['tp']
-            fp = clause_stats[clause]['fp']
-            fn = clause_stats[clause]['fn']
-            precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
-            recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
-            f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0.0
-            f1_scores[clause] = f1
-        return f1_scores
+        tp_counts = dict.fromkeys(_F1_CLAUSES, 0)
+        fp_counts = dict.fromkeys(_F1_CLAUSES, 0)
+        fn_counts = dict.fromkeys(_F1_CLAUSES, 0)
+        for pred_components, gold_components in self._component_sets(predicted_queries, gold_queries, db_ids, schema_path):
+            counts = self._component_match_counts(pred_components, gold_components)
+            for clause, (tp, fp, fn) in counts.items():
+                tp_counts[clause] += tp
+                fp_counts[clause] += fp
+                fn_counts[clause] += fn
+        return {
+            clause: self._f1_from_counts(tp_counts[clause], fp_counts[clause], fn_counts[clause])
+            for clause in _F1_CLAUSES
+        }
     
-    def _extract_keywords(self, query: str) -> List[str]:
+    def per_query_component_f1_scores(self, predicted_queries: List[str], gold_queries: List[str], db_ids: List[str], schema_path: str) -> List[Dict[str, float]]:
+        """
+        Component F1-scores for each query pair separately, in a single call.
+        Each entry equals component_wise_f1_score([pred], [gold], [db_id], schema_path),
+        but schemas are parsed once and reused.
+        """
+        if len(predicted_queries) != len(gold_queries) or len(predicted_queries) != len(db_ids):
+            raise ValueError("Predicted, gold query lists, and db_ids must have the same length")
+        scores = []
+        for pred_components, gold_components in self._component_sets(predicted_queries, gold_queries, db_ids, schema_path):
+            counts = self._component_match_counts(pred_components, gold_components)
+            scores.append({
+                clause: self._f1_from_counts(tp, fp, fn)
+                for clause, (tp, fp, fn) in counts.items()
+            })
+        return scores
+    
+    @staticmethod
+    def _component_match_counts(pred_components: Dict[str, set], gold_components: Dict[str, set]) -> Dict[str, Tuple[int, int, int]]:
+        """
+        (tp, fp, fn) per clause for one predicted/gold pair of component sets.
+        """
+        empty = frozenset()
+        counts = {}
+        for clause in _F1_CLAUSES:
+            pred_set = pred_components.get(clause, empty)
+            gold_set = gold_components.get(clause, empty)
+            
+            # Nếu cả predicted và gold đều rỗng, coi như perfect match
+            if not pred_set and not gold_set:
+                counts[clause] = (1, 0, 0)
+                continue
+            # |A - B| = |A| - |A & B|: một phép giao là đủ
+            tp = len(pred_set & gold_set)
+            counts[clause] = (tp, len(pred_set) - tp, len(gold_set) - tp)
+        return counts
+    
+    @staticmethod
+    def _f1_from_counts(tp: int, fp: int, fn: int) -> float:
+        """F1-score from true positive / false positive / false negative counts."""
+        precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
+        recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
+        return 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0.0
+    
+    def _extract_keywords(self, query: str, query_upper: Optional[str] = None) -> List[str]:
         """
         Extract SQL keywords from a query.
         
         Args:
             query (str): SQL query string
+            query_upper (Optional[str]): query.upper(), if the caller already has it
             
         Returns:
             List[str]: List of SQL keywords found in the query
         """
-        query_upper = query.upper()
-        keywords = []
-        
-        # Common SQL keywords
-        sql_keywords = [
-            'SELECT', 'FROM', 'WHERE', 'GROUP BY', 'ORDER BY', 'HAVING',
-            'JOIN', 'LEFT JOIN', 'RIGHT JOIN', 'INNER JOIN', 'OUTER JOIN',
-            'UNION', 'INTERSECT', 'EXCEPT', 'WITH', 'AS INCT',
-            'COUNT', 'SUM', 'AVG', 'MAX', 'MIN', 'CASE', 'WHEN', 'THEN', 'END',
-            'AND', 'OR', 'NOT', 'IN', 'EXISTS', 'LIKE', 'BETWEEN', 'IS NULL', 'NULL',
-            'ASC', 'DESC', 'LIMIT', 'OFFSET'
-        ]
-        
-        for keyword in sql_keywords:
-            if keyword in query_upper:
-                keywords.append(keyword)
-        
-        return keywords
+        if query_upper is None:
+            query_upper = query.upper()
+        return [keyword for keyword in _SQL_KEYWORDS if keyword in query_upper]
     
     def _normalize_component(self, component: str) -> str:
         """
@@ -157,14 +333,54 @@ class EvaluationMetrics:
         """
         if len(predicted_queries) != len(gold_queries) or len(predicted_queries) != len(db_ids):
             raise ValueError("Predicted, gold query lists, and db_ids must have the same length")
+        return self._component_accuracy_from_sets(
+            self._component_sets(predicted_queries, gold_queries, db_ids, schema_path)
+        )
+    
+    def _component_sets(self, predicted_queries: List[str], gold_queries: List[str], db_ids: List[str], schema_path) -> List[Tuple[Dict[str, set], Dict[str, set]]]:
+        """
+        (predicted, gold) extract_components_as_sets results for each query pair.
+        Each side is memoized per query list, db_ids and tables.json path;
+        a parsed schema mapping is not memoized since it may change between calls.
+        Treat the returned sets as read-only.
+        """
+        pred_features = self._query_features(self._pred_cache, predicted_queries)
+        gold_features = self._query_features(self._gold_cache, gold_queries)
+        if isinstance(schema_path, dict):
+            key = None
+            pred_sets = gold_sets = None
+        else:
+            key = ('components', tuple(db_ids), str(schema_path))
+            pred_sets = pred_features.get(key)
+            gold_sets = gold_features.get(key)
+        if pred_sets is None or gold_sets is None:
+            pred_uppers = self._cached_uppers(self._pred_cache, predicted_queries)
+            gold_uppers = self._cached_uppers(self._gold_cache, gold_queries)
+            new_pred_sets, new_gold_sets = [], []
+            for i, db_id in enumerate(db_ids[:len(predicted_queries)]):
+                schema_tables, schema_columns = self._get_schema_sets(db_id, schema_path)
+                if pred_sets is None:
+                    new_pred_sets.append(self.extract_components_as_sets(
+                        predicted_queries[i], schema_tables, schema_columns, pred_uppers[i]))
+                if gold_sets is None:
+                    new_gold_sets.append(self.extract_components_as_sets(
+                        gold_queries[i], schema_tables, schema_columns, gold_uppers[i]))
+            if pred_sets is None:
+                pred_sets = new_pred_sets
+                if key is not None:
+                    pred_features[key] = pred_sets
+            if gold_sets is None:
+                gold_sets = new_gold_sets
+                if key is not None:
+                    gold_features[key] = gold_sets
+        return list(zip(pred_sets, gold_sets))
+    
+    def _component_accuracy_from_sets(self, component_pairs: List[Tuple[Dict[str, set], Dict[str, set]]]) -> Dict[str, float]:
+        """Component-wise accuracy from precomputed (predicted, gold) component sets."""
         components = ['SELECT', 'FROM', 'WHERE', 'GROUP BY', 'ORDER BY', 'HAVING']
         component_matches = {comp: 0 for comp in components}
         component_totals = {comp: 0 for comp in components}
-        for pred, gold, db_id in zip(predicted_queries, gold_queries, db_ids):
-            schema = self.load_schema(db_id, schema_path)
-            schema_tables, schema_columns = self.get_table_and_column_sets(schema)
-            pred_components = self.extract_components_as_sets(pred, schema_tables, schema_columns)
-            gold_components = self.extract_components_as_sets(gold, schema_tables, schema_columns)
+        for pred_components, gold_components in component_pairs:
             for component in components:
                 if component in gold_components:
                     component_totals[component] += 1
@@ -193,15 +409,36 @@ class EvaluationMetrics:
         if len(predicted_queries) != len(gold_queries):
             raise ValueError("Predicted and gold query lists must have the same length")
         
-        similarities = []
-        for pred, gold in zip(predicted_queries, gold_queries):
-            pred_normalized = normalize_sql(pred)
-            gold_normalized = normalize_sql(gold)
-            
-            similarity = SequenceMatcher(None, pred_normalized, gold_normalized).ratio()
-            similarities.append(similarity)
-        
-        return similarities
+        pred_norms = self._cached_norms(self._pred_cache, predicted_queries)
+        gold_norms = self._cached_norms(self._gold_cache, gold_queries)
+        return self._similarity_from_norms(pred_norms, gold_norms)
+    
+    def _similarity_from_norms(self, pred_norms: List[str], gold_norms: List[str]) -> List[float]:
+        """String similarity for each pair of queries already passed through normalize_sql."""
+        if self.similarity == 'rapidfuzz':
+            return [
+                _rapidfuzz_fuzz.ratio(pred, gold) / 100.0
+                for pred, gold in zip(pred_norms, gold_norms)
+            ]
+        if self.similarity == 'ngram':
+            # Dựng n-gram một lần cho mỗi query chuẩn hóa khác nhau (gold thường lặp lại)
+            grams = {}
+            scores = []
+            for pred, gold in zip(pred_norms, gold_norms):
+                pred_grams = grams.get(pred)
+                if pred_grams is None:
+                    pred_grams = grams[pred] = _ngrams(pred)
+                gold_grams = grams.get(gold)
+                if gold_grams is None:
+                    gold_grams = grams[gold] = _ngrams(gold)
+                # |A ∪ B| = |A| + |B| - |A ∩ B|
+                common = len(pred_grams & gold_grams)
+                scores.append(common / (len(pred_grams) + len(gold_grams) - common))
+            return scores
+        return [
+            SequenceMatcher(None, pred, gold).ratio()
+            for pred, gold in zip(pred_norms, gold_norms)
+        ]
     
     def difficulty_breakdown_accuracy(self, predicted_queries: List[str], gold_queries: List[str]) -> Dict[str, Dict[str, Any]]:
         """
@@ -217,103 +454,90 @@ class EvaluationMetrics:
         if len(predicted_queries) != len(gold_queries):
             raise ValueError("Predicted and gold query lists must have the same length")
         
-        # Classify queries by difficulty
+        difficulties = self._gold_difficulties(gold_queries)
+        pred_norms = self._cached_norms(self._pred_cache, predicted_queries)
+        gold_norms = self._cached_norms(self._gold_cache, gold_queries)
+        similarities = self._similarity_from_norms(pred_norms, gold_norms)
+        return self._difficulty_from_cached(difficulties, pred_norms, gold_norms, similarities)
+    
+    @staticmethod
+    def _difficulty_from_cached(difficulties: List[str], pred_norms: List[str], gold_norms: List[str], similarities: List[float]) -> Dict[str, Dict[str, Any]]:
+        """
+        Accuracy breakdown by difficulty from per-query difficulty labels,
+        normalized queries and similarity scores computed beforehand.
+        """
+        # Group query indices by difficulty
         difficulty_groups = defaultdict(list)
-        for i, (pred, gold) in enumerate(zip(predicted_queries, gold_queries)):
-            difficulty = self.difficulty_classifier.classify_query(gold)
-            difficulty_groups[difficulty].append((i, pred, gold))
+        for i, difficulty in enumerate(difficulties):
+            difficulty_groups[difficulty].append(i)
         
         # Calculate accuracy for each difficulty level
         breakdown = {}
-        for difficulty, queries in difficulty_groups.items():
-            if not queries:
+        for difficulty, indices in difficulty_groups.items():
+            if not indices:
                 continue
-                
-            exact_matches = 0
-            similarities = []
             
-            for _, pred, gold in queries:
-                # Exact match
-                pred_normalized = normalize_sql(pred)
-                gold_normalized = normalize_sql(gold)
-                if pred_normalized == gold_normalized:
-                    exact_matches += 1
-                
-                # Similarity
-                similarity = SequenceMatcher(None, pred_normalized, gold_normalized).ratio()
-                similarities.append(similarity)
+            exact_matches = sum(1 for i in indices if pred_norms[i] == gold_norms[i])
+            group_similarities = [similarities[i] for i in indices]
             
             breakdown[difficulty] = {
-                'count': len(queries),
-                'exact_match_accuracy': exact_matches / len(queries),
-                'avg_similarity': sum(similarities) / len(similarities),
-                'percentage_of_total': len(queries) / len(predicted_queries) * 100
+                'count': len(indices),
+                'exact_match_accuracy': exact_matches / len(indices),
+                'avg_similarity': sum(group_similarities) / len(group_similarities),
+                'percentage_of_total': len(indices) / len(difficulties) * 100
             }
         
         return breakdown
     
-    def _extract_sql_components(self, query: str) -> Dict[str, str]:
+    def _extract_sql_components(self, query: str, query_upper: Optional[str] = None) -> Dict[str, str]:
         """
         Extract SQL components from a query.
         
         Args:
             query (str): SQL query string
+            query_upper (Optional[str]): query.upper(), if the caller already has it
             
         Returns:
             Dict[str, str]: Dictionary of SQL components
         """
         try:
-            parsed = sqlparse.parse(query)[0]
+            # Tách trực tiếp bằng regex trên chuỗi upper(); cây sqlparse không được dùng đến
             components = {}
+            if query_upper is None:
+                query_upper = query.upper()
             
-            # Convert to string and split by keywords
-            query_upper = query.upper()
-            
-            # Extract SELECT
-            select_match = re.search(r'SELECT\s+(.*?)\s+FROM', query_upper, re.DOTALL)
-            if select_match:
-                components['SELECT'] = select_match.group(1).strip()
-            
-            # Extract FROM
-            from_match = re.search(r'FROM\s+(.*?)(?:\s+WHERE|\s+GROUP|\s+ORDER|\s+HAVING|$)', query_upper, re.DOTALL)
-            if from_match:
-                components['FROM'] = from_match.group(1).strip()
-            
-            # Extract WHERE
-            where_match = re.search(r'WHERE\s+(.*?)(?:\s+GROUP|\s+ORDER|\s+HAVING|$)', query_upper, re.DOTALL)
-            if where_match:
-                components['WHERE'] = where_match.group(1).strip()
-            
-            # Extract GROUP BY
-            group_match = re.search(r'GROUP\s+BY\s+(.*?)(?:\s+ORDER|\s+HAVING|$)', query_upper, re.DOTALL)
-            if group_match:
-                components['GROUP BY'] = group_match.group(1).strip()
-            
-            # Extract ORDER BY
-            order_match = re.search(r'ORDER\s+BY\s+(.*?)(?:\s+HAVING|$)', query_upper, re.DOTALL)
-            if order_match:
-                components['ORDER BY'] = order_match.group(1).strip()
-            
-            # Extract HAVING
-            having_match = re.search(r'HAVING\s+(.*?)$', query_upper, re.DOTALL)
-            if having_match:
-                components['HAVING'] = having_match.group(1).strip()
+            for clause, pattern in _UPPER_CLAUSE_RES.items():
+                match = pattern.search(query_upper)
+                if match:
+                    components[clause] = match.group(1).strip()
             
             return components
             
         except Exception:
             return {}
     
-    def load_schema(self, db_id: str, schema_path: str) -> dict:
+    def load_schema(self, db_id: str, schema_path) -> dict:
         """
         Load schema for a given db_id from tables.json.
+        schema_path may also be an already parsed db_id -> schema mapping.
+        The parsed file is cached per path; treat the returned schema as read-only.
         """
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            schemas = json.load(f)
-        for schema in schemas:
-            if schema['db_id'] == db_id:
-                return schema
-        return {}
+        if isinstance(schema_path, dict):
+            return schema_path.get(db_id, {})
+        return _load_schemas(str(schema_path)).get(db_id, {})
+
+    def _get_schema_sets(self, db_id: str, schema_path) -> Tuple[set, set]:
+        """
+        (tables, columns) sets for db_id, memoized per tables.json path across calls.
+        A parsed db_id -> schema mapping is not memoized since it may change between calls.
+        """
+        if isinstance(schema_path, dict):
+            return self.get_table_and_column_sets(self.load_schema(db_id, schema_path))
+        memo = self._schema_sets_cache.setdefault(str(schema_path), {})
+        sets = memo.get(db_id)
+        if sets is None:
+            sets = memo[db_id] = self.get_table_and_column_sets(self.load_schema(db_id, schema_path))
+        return sets
 
     def get_table_and_column_sets(self, schema: dict) -> (set, set):
         """
@@ -327,13 +551,16 @@ class EvaluationMetrics:
                 columns.add(f"{table_names[idx]}.{col}")
         return tables, columns
 
-    def extract_components_as_sets(self, query: str, schema_tables: set, schema_columns: set) -> Dict[str, set]:
+    def extract_components_as_sets(self, query: str, schema_tables: set, schema_columns: set,
+                                   query_upper: Optional[str] = None) -> Dict[str, set]:
         """
         Extract SQL components from a query as sets of normalized strings.
         Luôn chuẩn hóa alias về tên bảng gốc trước khi tách trường/điều kiện.
+        query_upper: query.upper(), if the caller already has it.
         """
+        if query_upper is None:
+            query_upper = query.upper()
         components = {}
-        query_upper = query.upper()
         # Parse alias mapping từ FROM/JOIN
         alias_map = self._extract_alias_mapping(query)
         # Helper: thay alias về tên bảng gốc trong toàn bộ query
@@ -342,8 +569,12 @@ class EvaluationMetrics:
                 sql = re.sub(rf'\b{re.escape(alias)}\.', f'{table}.', sql)
             return sql
         query_no_alias = replace_alias_all(query, alias_map)
+        # upper() một lần để bỏ qua regex của các mệnh đề không có từ khóa.
+        # Ký tự khớp A-Z khi IGNORECASE đều upper() về đúng chữ đó, trừ 'İ' (khớp I)
+        no_alias_upper = query_upper if query_no_alias == query else query_no_alias.upper()
+        has_i_dot = '\u0130' in query_no_alias
         # SELECT
-        select_match = re.search(r'SELECT\s+(.*?)\s+FROM', query_no_alias, re.DOTALL | re.IGNORECASE)
+        select_match = _CLAUSE_RES['SELECT'].search(query_no_alias)
         if select_match:
             select_clause = select_match.group(1).strip()
             # Xóa dấu chấm phẩy dư thừa
@@ -355,7 +586,7 @@ class EvaluationMetrics:
             fields = [self._normalize_token(f.split(' AS ')[0]) for f in select_clause.split(',')]
             components['SELECT'] = set(fields)
         # FROM
-        from_match = re.search(r'FROM\s+(.*?)(?:\s+WHERE|\s+GROUP|\s+ORDER|\s+HAVING|$)', query_no_alias, re.DOTALL | re.IGNORECASE)
+        from_match = _CLAUSE_RES['FROM'].search(query_no_alias)
         if from_match:
             from_clause = from_match.group(1).strip()
             # Xóa dấu chấm phẩy dư thừa
@@ -364,7 +595,7 @@ class EvaluationMetrics:
             tables = [self._normalize_token(t.split()[0]) for t in from_clause.split(',')]
             components['FROM'] = set(tables)
         # WHERE
-        where_match = re.search(r'WHERE\s+(.*?)(?:\s+GROUP|\s+ORDER|\s+HAVING|$)', query_no_alias, re.DOTALL | re.IGNORECASE)
+        where_match = _CLAUSE_RES['WHERE'].search(query_no_alias) if 'WHERE' in no_alias_upper else None
         if where_match:
             where_clause = where_match.group(1).strip()
             # Chuẩn hóa WHERE clause trước khi tách
@@ -372,11 +603,11 @@ class EvaluationMetrics:
             # Normalize alias trong WHERE clause
             where_clause = self.normalize_where_alias(where_clause, alias_map)
             # Tách điều kiện theo AND/OR
-            conds = re.split(r'\b(?:AND|OR)\b', where_clause, flags=re.IGNORECASE)
+            conds = _split_and_or(where_clause)
             conds = [c.strip() for c in conds if c.strip()]  # Không normalize thêm bằng _normalize_token
             components['WHERE'] = set(conds)
         # GROUP BY
-        group_match = re.search(r'GROUP\s+BY\s+(.*?)(?:\s+ORDER|\s+HAVING|$)', query_no_alias, re.DOTALL | re.IGNORECASE)
+        group_match = _CLAUSE_RES['GROUP BY'].search(query_no_alias) if 'GROUP' in no_alias_upper else None
         if group_match:
             group_by_clause = group_match.group(1).strip()
             # Xóa dấu chấm phẩy dư thừa
@@ -388,7 +619,7 @@ class EvaluationMetrics:
             fields = [self._normalize_token(f) for f in group_by_clause.split(',')]
             components['GROUP BY'] = set(fields)
         # ORDER BY
-        order_match = re.search(r'ORDER\s+BY\s+(.*?)(?:\s+HAVING|$)', query_no_alias, re.DOTALL | re.IGNORECASE)
+        order_match = _CLAUSE_RES['ORDER BY'].search(query_no_alias) if 'ORDER' in no_alias_upper else None
         if order_match:
             order_by_clause = order_match.group(1).strip()
             # Xóa dấu chấm phẩy dư thừa
@@ -400,24 +631,29 @@ class EvaluationMetrics:
             fields = [self._normalize_token(f.split()[0]) for f in order_by_clause.split(',')]
             components['ORDER BY'] = set(fields)
         # HAVING
-        having_match = re.search(r'HAVING\s+(.*?)$', query_no_alias, re.DOTALL | re.IGNORECASE)
+        having_match = (
+            _CLAUSE_RES['HAVING'].search(query_no_alias)
+            if 'HAVING' in no_alias_upper or has_i_dot else None
+        )
         if having_match:
             having_clause = having_match.group(1).strip()
             # Xóa dấu chấm phẩy dư thừa
             having_clause = having_clause.rstrip(';')
             # Normalize alias trong HAVING clause
             having_clause = self.normalize_where_alias(having_clause, alias_map)
-            conds = re.split(r'\b(?:AND|OR)\b', having_clause, flags=re.IGNORECASE)
+            conds = _split_and_or(having_clause)
             conds = [c.strip() for c in conds if c.strip()]  # Không normalize thêm bằng _normalize_token
             components['HAVING'] = set(conds)
         # KEYWORDS
-        keywords = self._extract_keywords(query)
+        keywords = self._extract_keywords(query, query_upper)
         components['KEYWORDS'] = set(keywords)
-        # Cảnh báo nếu alias không mapping được
-        for m in re.finditer(r'\b(\w+)\.', query):
-            alias = m.group(1)
-            if alias not in alias_map and not self._normalize_token(alias) in schema_tables:
-                print(f"[WARNING] Alias '{alias}' không mapping được trong query: {query}")
+        # Cảnh báo nếu alias không mapping được (bỏ qua khi không có schema để đối chiếu,
+        # nếu không mọi tên bảng dùng làm tiền tố đều bị báo nhầm)
+        if schema_tables:
+            for m in _QUALIFIER_RE.finditer(query):
+                alias = m.group(1)
+                if alias not in alias_map and not self._normalize_token(alias) in schema_tables:
+                    print(f"[WARNING] Alias '{alias}' không mapping được trong query: {query}")
         return components
 
     def _extract_alias_mapping(self, query: str) -> dict:
@@ -426,8 +662,7 @@ class EvaluationMetrics:
         Luôn normalize alias và tên bảng về lowercase, strip, thay underscore thành dấu cách, unicode NFC.
         """
         alias_map = {}
-        from_join_pattern = re.compile(r'(FROM|JOIN)\s+([\w\s]+?)(?:\s+AS)?\s+(\w+)', re.IGNORECASE)
-        for match in from_join_pattern.finditer(query):
+        for match in _FROM_JOIN_ALIAS_RE.finditer(query):
             table_part = match.group(2).strip()
             alias = match.group(3).strip()
             # Normalize alias và table_name
@@ -462,10 +697,10 @@ class EvaluationMetrics:
         where_clause = where_clause.rstrip(';')
         
         # 1. Thay <> thành !=
-        where_clause = re.sub(r'<>', '!=', where_clause)
+        where_clause = where_clause.replace('<>', '!=')
         
         # 2. Chuẩn hóa LIKE thành lowercase
-        where_clause = re.sub(r'\bLIKE\b', 'like', where_clause, flags=re.IGNORECASE)
+        where_clause = _LIKE_RE.sub('like', where_clause)
         
         # 3. Chuẩn hóa giá trị trong ngoặc
         def normalize_value(match):
@@ -482,7 +717,7 @@ class EvaluationMetrics:
             return f'"{value}"'
         
         # Tìm và chuẩn hóa các giá trị trong ngoặc
-        where_clause = re.sub(r'([\'"])([^\'"]*)\1', normalize_value, where_clause)
+        where_clause = _QUOTED_VALUE_RE.sub(normalize_value, where_clause)
         
         return where_clause
 
@@ -506,7 +741,7 @@ class EvaluationMetrics:
             return match.group(0)  # Giữ nguyên nếu không tìm thấy
         
         # Pattern để tìm alias.column
-        where_clause = re.sub(r'(\w+)\.(\w+)', replace_alias, where_clause)
+        where_clause = _ALIAS_COLUMN_RE.sub(replace_alias, where_clause)
         
         return where_clause
 
@@ -522,9 +757,8 @@ class EvaluationMetrics:
         # Nếu alias_map rỗng, thử tạo alias_map từ query
         if not alias_map and query:
             # Tìm tất cả table names trong FROM/JOIN
-            from_join_pattern = re.compile(r'(FROM|JOIN)\s+([\w\s]+?)(?:\s+AS\s+\w+)?', re.IGNORECASE)
             tables = []
-            for match in from_join_pattern.finditer(query):
+            for match in _FROM_JOIN_TABLE_RE.finditer(query):
                 table_part = match.group(2).strip()
                 table_name = table_part.split()[0]
                 tables.append(table_name)  # Giữ nguyên table name gốc
@@ -577,7 +811,7 @@ class EvaluationMetrics:
                 part = part.split(' AS ')[0].strip()
             # Remove function calls, keep column names
             if '(' in part and ')' in part:
-                match = re.search(r'\(([^)]+)\)', part)
+                match = _FUNC_ARG_RE.search(part)
                 if match:
                     col = match.group(1).strip()
                     col = self._normalize_column_alias(col, alias_map)
@@ -597,7 +831,7 @@ class EvaluationMetrics:
 
     def _parse_from_clause_with_alias(self, clause: str, schema_tables: set, alias_map: dict) -> set:
         components = set()
-        parts = re.split(r'\b(?:JOIN|LEFT JOIN|RIGHT JOIN|INNER JOIN|OUTER JOIN)\b', clause, flags=re.IGNORECASE)
+        parts = _JOIN_SPLIT_RE.split(clause)
         for part in parts:
             part = part.strip()
             if part:
@@ -613,11 +847,11 @@ class EvaluationMetrics:
 
     def _parse_where_clause_with_alias(self, clause: str, schema_columns: set, alias_map: dict) -> set:
         components = set()
-        parts = re.split(r'\b(?:AND|OR)\b', clause, flags=re.IGNORECASE)
+        parts = _split_and_or(clause)
         for part in parts:
             part = part.strip()
             if part:
-                match = re.search(r'(\w+)(?:\.(\w+))?\s*[=<>!]+\s*', part)
+                match = _WHERE_COND_RE.search(part)
                 if match:
                     prefix = match.group(1)
                     col = match.group(2) if match.group(2) else prefix
@@ -669,8 +903,9 @@ class EvaluationMetrics:
         parts = [part.strip() for part in clause.split(',')]
         for part in parts:
             # Remove ASC/DESC
-            if ' ASC' in part.upper() or ' DESC' in part.upper():
-                part = re.sub(r'(?:ASC|DESC)\b', '', part, flags=re.IGNORECASE)
+            part_upper = part.upper()
+            if ' ASC' in part_upper or ' DESC' in part_upper:
+                part = _ASC_DESC_RE.sub('', part)
             components.add(part)
         return components
     
@@ -680,16 +915,17 @@ class EvaluationMetrics:
         """
         components = set()
         # Split by AND, OR
-        parts = re.split(r'\b(?:AND|OR)\b', clause, flags=re.IGNORECASE)
+        parts = _split_and_or(clause)
         for part in parts:
             part = part.strip()
             if part:
                 # Extract aggregate functions and conditions
-                if 'COUNT' in part.upper() or 'SUM' in part.upper() or 'AVG' in part.upper():
+                part_upper = part.upper()
+                if 'COUNT' in part_upper or 'SUM' in part_upper or 'AVG' in part_upper:
                     components.add(part)
                 else:
                     # Extract column names from conditions
-                    match = re.search(r'(\w+(?:\.\w+)?)\s*[=<>!]+\s*', part)
+                    match = _HAVING_COND_RE.search(part)
                     if match:
                         components.add(match.group(1).strip())
         return components
@@ -758,24 +994,64 @@ class EvaluationMetrics:
         return pred_where == gold_where
     
     def comprehensive_evaluation(self, predicted_queries: List[str], gold_queries: List[str], 
-                               execution_results: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+                               execution_results: Optional[List[Dict[str, Any]]] = None,
+                               db_ids: Optional[List[str]] = None, schema_path=None,
+                               n_jobs: int = 1) -> Dict[str, Any]:
         """
         Perform comprehensive evaluation with all metrics.
         
+        Each query is normalized, classified and split into components once,
+        and the results are shared by all metrics.
+        
         Args:
             predicted_queries (List[str]): List of predicted SQL queries
             gold_queries (List[str]): List of gold/reference SQL queries
             execution_results (Optional[List[Dict[str, Any]]]): Execution comparison results
+            db_ids (Optional[List[str]]): db_id for each query (for schema-aware component accuracy)
+            schema_path: Path to tables.json (or a parsed db_id -> schema mapping)
+            n_jobs (int): Worker processes for the per-query work (-1 = all CPUs, 1 = no pool)
             
         Returns:
             Dict[str, Any]: Comprehensive evaluation results
         """
+        if len(predicted_queries) != len(gold_queries):
+            raise ValueError("Predicted and gold query lists must have the same length")
+        if db_ids is None or schema_path is None:
+            # Không có schema: component sets không phụ thuộc schema nên vẫn giống hệt;
+            # extract_components_as_sets bỏ qua cảnh báo alias khi schema_tables rỗng
+            db_ids = [''] * len(predicted_queries)
+            schema_path = {}
+        elif len(db_ids) != len(predicted_queries):
+            raise ValueError("Predicted, gold query lists, and db_ids must have the same length")
+        
+        workers = (os.cpu_count() or 1) if n_jobs == -1 else max(1, n_jobs)
+        workers = min(workers, len(predicted_queries))
+        if workers > 1:
+            # Các cặp query độc lập với nhau: chia thành từng khúc liên tiếp cho mỗi process
+            chunk_size = -(-len(predicted_queries) // workers)
+            starts = range(0, len(predicted_queries), chunk_size)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunks = list(executor.map(
+                    self._preprocess_pairs,
+                    [predicted_queries[i:i + chunk_size] for i in starts],
+                    [gold_queries[i:i + chunk_size] for i in starts],
+                    [db_ids[i:i + chunk_size] for i in starts],
+                    [schema_path] * len(starts)
+                ))
+            pred_norms, gold_norms, similarities, difficulties, component_pairs = (
+                [item for chunk in chunks for item in chunk[k]] for k in range(5)
+            )
+        else:
+            pred_norms, gold_norms, similarities, difficulties, component_pairs = self._preprocess_pairs(
+                predicted_queries, gold_queries, db_ids, schema_path
+            )
+        
         results = {
             'total_queries': len(predicted_queries),
-            'exact_match_accuracy': self.exact_match_accuracy(predicted_queries, gold_queries),
-            'component_wise_accuracy': self.component_wise_accuracy(predicted_queries, gold_queries),
-            'avg_sql_similarity': sum(self.sql_similarity(predicted_queries, gold_queries)) / len(predicted_queries) if predicted_queries else 0,
-            'difficulty_breakdown': self.difficulty_breakdown_accuracy(predicted_queries, gold_queries)
+            'exact_match_accuracy': self._exact_match_from_norms(pred_norms, gold_norms),
+            'component_wise_accuracy': self._component_accuracy_from_sets(component_pairs),
+            'avg_sql_similarity': sum(similarities) / len(predicted_queries) if predicted_queries else 0,
+            'difficulty_breakdown': self._difficulty_from_cached(difficulties, pred_norms, gold_norms, similarities)
         }
         
         # Add execution metrics if provided
@@ -794,6 +1070,18 @@ class EvaluationMetrics:
         
         return results
     
+    def _preprocess_pairs(self, predicted_queries: List[str], gold_queries: List[str], db_ids: List[str], schema_path) -> Tuple[list, list, list, list, list]:
+        """
+        Per-query work shared by all metrics of comprehensive_evaluation:
+        (pred_norms, gold_norms, similarities, difficulties, component_pairs).
+        """
+        pred_norms = self._cached_norms(self._pred_cache, predicted_queries)
+        gold_norms = self._cached_norms(self._gold_cache, gold_queries)
+        similarities = self._similarity_from_norms(pred_norms, gold_norms)
+        difficulties = self._gold_difficulties(gold_queries)
+        component_pairs = self._component_sets(predicted_queries, gold_queries, db_ids, schema_path)
+        return pred_norms, gold_norms, similarities, difficulties, component_pairs
+    
     def evaluation_summary(self, results: Dict[str, Any]) -> str:
         """
         Generate a human-readable evaluation summary.
@@ -831,36 +1119,39 @@ class SQLDifficultyClassifier:
     Classifier for determining SQL query difficulty levels.
     """
     
-    def classify_query(self, query: str) -> str:
+    def classify_query(self, query: str, query_upper: Optional[str] = None) -> str:
         """
         Classify SQL query difficulty.
         
         Args:
             query (str): SQL query to classify
+            query_upper (Optional[str]): query.upper(), if the caller already has it
             
         Returns:
             str: Difficulty level ('easy', 'medium', 'hard', 'extra')
         """
-        query_upper = query.upper()
+        if query_upper is None:
+            query_upper = query.upper()
         
         # Count different SQL features
-        has_join = bool(re.search(r'\bJOIN\b', query_upper))
+        features = {match.lastgroup for match in _DIFFICULTY_FEATURES_RE.finditer(query_upper)}
+        has_join = 'join' in features
         has_subquery = '(' in query and 'SELECT' in query_upper[query_upper.find('(')+1:]
-        has_union = bool(re.search(r'\bUNION\b', query_upper))
-        has_intersect = bool(re.search(r'\bINTERSECT\b', query_upper))
-        has_except = bool(re.search(r'\bEXCEPT\b', query_upper))
-        has_window = bool(re.search(r'\bOVER\s*\(', query_upper))
-        has_cte = bool(re.search(r'\bWITH\b', query_upper))
+        has_union = 'union' in features
+        has_intersect = 'intersect' in features
+        has_except = 'except' in features
+        has_window = 'window' in features
+        has_cte = 'cte' in features
         
         # Aggregate functions
         agg_functions = ['COUNT', 'SUM', 'AVG', 'MAX', 'MIN']
         has_aggregation = any(func in query_upper for func in agg_functions)
         
         # Clauses
-        has_group_by = bool(re.search(r'\bGROUP\s+BY\b', query_upper))
-        has_order_by = bool(re.search(r'\bORDER\s+BY\b', query_upper))
-        has_having = bool(re.search(r'\bHAVING\b', query_upper))
-        has_where = bool(re.search(r'\bWHERE\b', query_upper))
+        has_group_by = 'group_by' in features
+        has_order_by = 'order_by' in features
+        has_having = 'having' in features
+        has_where = 'where' in features
         
         # Complex WHERE conditions
         where_operators = ['AND', 'OR', 'IN', 'NOT IN', 'EXISTS', 'NOT EXISTS', 'LIKE', 'BETWEEN']
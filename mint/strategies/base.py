@@ -4,10 +4,19 @@ Base Strategy Class for ViPERSQL
 Defines the common interface and shared functionality for all NL2SQL strategies.
 """
 
+import itertools
+import logging
+import time
 from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from ..config import ViPERConfig
+from ..utils import progress_write
+
+_logger = logging.getLogger(__name__)
+
+# Bộ đếm chung cho request ID: nhiều luồng có thể tạo ID trong cùng một micro giây
+_REQUEST_COUNTER = itertools.count()
 
 
 @dataclass 
@@ -46,6 +55,19 @@ class BaseStrategy(ABC):
         self.llm = LLMInterface(config)
         self.templates = TemplateManager(config)
         
+    def new_request_id(self) -> str:
+        """Unique request ID: microsecond timestamp plus a process-wide counter."""
+        prefix = self.strategy_name.replace('-', '_')
+        return f"{prefix}_{int(time.time() * 1000000)}_{next(_REQUEST_COUNTER)}"
+    
+    def log(self, message: str):
+        """Per-request detail; debug level so it stays out of the caller's progress bar."""
+        _logger.debug(message)
+    
+    def log_error(self, message: str):
+        """Report a failure without breaking the caller's tqdm progress bar."""
+        progress_write(message)
+    
     @abstractmethod
     def _get_strategy_name(self) -> str:
         """Return the name of this strategy."""
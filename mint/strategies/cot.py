@@ -39,7 +39,7 @@ class CoTStrategy(BaseStrategy):
             from pathlib import Path
             train_file = Path(dataset_path) / "train.json"
             if not train_file.exists():
-                print(f"[CoT] Training file not found: {train_file}")
+                self.log_error(f"[CoT] Training file not found: {train_file}")
                 return []
             
             with open(train_file, 'r', encoding='utf-8') as f:
@@ -48,16 +48,16 @@ class CoTStrategy(BaseStrategy):
             if db_id:
                 filtered_data = [ex for ex in train_data if ex.get('db_id') == db_id]
                 if not filtered_data:
-                    print(f"[CoT] No examples found for database {db_id}, using all examples")
+                    self.log(f"[CoT] No examples found for database {db_id}, using all examples")
                     filtered_data = train_data
             else:
                 filtered_data = train_data
             
             self._training_examples = filtered_data
-            print(f"[CoT] Loaded {len(filtered_data)} training examples for CoT")
+            self.log(f"[CoT] Loaded {len(filtered_data)} training examples for CoT")
             return filtered_data
         except Exception as e:
-            print(f"[CoT] Failed to load training examples for CoT: {e}")
+            self.log_error(f"[CoT] Failed to load training examples for CoT: {e}")
             return []
 
     def select_cot_examples(self, question: str, db_id: str = None) -> List[Dict]:
@@ -134,7 +134,7 @@ SQL: {query}"""
             StrategyResult with generated SQL and metadata
         """
         # Generate unique request ID
-        request_id = f"cot_{int(time.time() * 1000000)}"
+        request_id = self.new_request_id()
         
         try:
             # Prepare schema context
@@ -160,7 +160,7 @@ SQL: {query}"""
             formatted_prompt = template.format(**template_vars)
             
             # Log the request
-            print(f"[CoT] Request {request_id}: CoT generation for {db_id}")
+            self.log(f"[CoT] Request {request_id}: CoT generation for {db_id}")
             
             # Generate SQL using LLM with CoT reasoning
             start_time = time.time()
@@ -209,7 +209,7 @@ SQL: {query}"""
             )
             
             # Log successful generation
-            print(
+            self.log(
                 f"[CoT] Request {request_id}: Generated SQL in {latency:.2f}s - Valid: {is_valid}"
             )
             
@@ -221,7 +221,7 @@ SQL: {query}"""
         except Exception as e:
             # Log error and return error result
             error_msg = f"CoT generation failed: {str(e)}"
-            print(f"[CoT] Request {request_id}: {error_msg}")
+            self.log_error(f"[CoT] Request {request_id}: {error_msg}")
             
             return self.create_error_result(request_id, error_msg, 'cot')
 
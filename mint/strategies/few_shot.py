@@ -25,22 +25,22 @@ class FewShotStrategy(BaseStrategy):
             from pathlib import Path
             train_file = Path(dataset_path) / "train.json"
             if not train_file.exists():
-                print(f"[FewShot] Training file not found: {train_file}")
+                self.log_error(f"[FewShot] Training file not found: {train_file}")
                 return []
             with open(train_file, 'r', encoding='utf-8') as f:
                 train_data = json.load(f)
             if db_id:
                 filtered_data = [ex for ex in train_data if ex.get('db_id') == db_id]
                 if not filtered_data:
-                    print(f"[FewShot] No examples found for database {db_id}, using all examples")
+                    self.log(f"[FewShot] No examples found for database {db_id}, using all examples")
                     filtered_data = train_data
             else:
                 filtered_data = train_data
             self._training_examples = filtered_data
-            print(f"[FewShot] Loaded {len(filtered_data)} training examples")
+            self.log(f"[FewShot] Loaded {len(filtered_data)} training examples")
             return filtered_data
         except Exception as e:
-            print(f"[FewShot] Failed to load training examples: {e}")
+            self.log_error(f"[FewShot] Failed to load training examples: {e}")
             return []
 
     def select_examples(self, question: str, db_id: str = None, k: int = None) -> List[Dict]:
@@ -51,14 +51,14 @@ class FewShotStrategy(BaseStrategy):
             dataset_path = self.config.dataset_full_path
             self.load_training_examples(dataset_path, db_id)
         if not self._training_examples:
-            print(f"[FewShot] No training examples available")
+            self.log_error(f"[FewShot] No training examples available")
             return []
         if self.selection_strategy == 'random':
             selected = self._select_random_examples(k)
         else:
-            print(f"[FewShot] Strategy {self.selection_strategy} not implemented, using random")
+            self.log(f"[FewShot] Strategy {self.selection_strategy} not implemented, using random")
             selected = self._select_random_examples(k)
-        print(f"[FewShot] Selected {len(selected)} examples using {self.selection_strategy} strategy")
+        self.log(f"[FewShot] Selected {len(selected)} examples using {self.selection_strategy} strategy")
         return selected
 
     def _select_random_examples(self, k: int) -> List[Dict]:
@@ -87,7 +87,7 @@ class FewShotStrategy(BaseStrategy):
         examples: Optional[List[Dict]] = None
     ) -> StrategyResult:
         """Generate SQL query using few-shot approach."""
-        request_id = f"few_shot_{int(time.time() * 1000000)}"
+        request_id = self.new_request_id()
         try:
             if examples is None:
                 examples = self.select_examples(question, db_id)
@@ -100,7 +100,7 @@ class FewShotStrategy(BaseStrategy):
             }
             template = self.templates.get_template('few-shot')
             formatted_prompt = template.format(**template_vars)
-            print(f"[FewShot] Request {request_id}: Few-shot generation for {db_id} with {len(examples)} examples")
+            self.log(f"[FewShot] Request {request_id}: Few-shot generation for {db_id} with {len(examples)} examples")
             start_time = time.time()
             raw_response = self.llm.generate(
                 prompt=formatted_prompt,
@@ -136,12 +136,12 @@ class FewShotStrategy(BaseStrategy):
                     'k_examples': self.k_examples
                 }
             )
-            print(
+            self.log(
                 f"[FewShot] Request {request_id}: Generated SQL in {latency:.2f}s - Valid: {is_valid}"
             )
             self.log_strategy_execution(request_id, question, db_id, result)
             return result
         except Exception as e:
             error_msg = f"Few-shot generation failed: {str(e)}"
-            print(f"[FewShot] Request {request_id}: {error_msg}")
+            self.log_error(f"[FewShot] Request {request_id}: {error_msg}")
             return self.create_error_result(request_id, error_msg, 'few-shot') 
\ No newline at end of file
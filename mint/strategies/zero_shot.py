@@ -43,7 +43,7 @@ class ZeroShotStrategy(BaseStrategy):
             StrategyResult with generated SQL and metadata
         """
         # Generate unique request ID
-        request_id = f"zero_shot_{int(time.time() * 1000000)}"
+        request_id = self.new_request_id()
         
         try:
             # Prepare schema context
@@ -61,7 +61,7 @@ class ZeroShotStrategy(BaseStrategy):
             formatted_prompt = template.format(**template_vars)
             
             # Log the request
-            print(f"[ZeroShot] Request {request_id}: Zero-shot generation for {db_id}")
+            self.log(f"[ZeroShot] Request {request_id}: Zero-shot generation for {db_id}")
             
             # Generate SQL using LLM
             start_time = time.time()
@@ -103,7 +103,7 @@ class ZeroShotStrategy(BaseStrategy):
             )
             
             # Log successful generation
-            print(
+            self.log(
                 f"[ZeroShot] Request {request_id}: Generated SQL in {latency:.2f}s - Valid: {is_valid}"
             )
             
@@ -115,7 +115,7 @@ class ZeroShotStrategy(BaseStrategy):
         except Exception as e:
             # Log error and return error result
             error_msg = f"Zero-shot generation failed: {str(e)}"
-            print(f"[ZeroShot] Request {request_id}: {error_msg}")
+            self.log_error(f"[ZeroShot] Request {request_id}: {error_msg}")
             
             return self.create_error_result(request_id, error_msg, 'zero-shot')
     
@@ -6,9 +6,24 @@ Provides common functions for data loading, SQL normalization, and other helpers
 import re
 import json
 import sqlparse
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Union
 
+try:
+    from tqdm import tqdm
+except ImportError:  # tqdm is optional, fall back to plain prints
+    tqdm = None
+
+
+def progress_write(message: str):
+    """Print a line without breaking a tqdm progress bar (if one is shown)."""
+    if tqdm is not None:
+        tqdm.write(message)
+    else:
+        print(message)
+
+
 def normalize_sql(query: str) -> str:
     """
     Normalize SQL query for comparison.
@@ -22,6 +37,12 @@ def normalize_sql(query: str) -> str:
     if not query or not isinstance(query, str):
         return ""
     
+    return _normalize_sql_cached(query)
+
+
+@lru_cache(maxsize=8192)
+def _normalize_sql_cached(query: str) -> str:
+    """normalize_sql for a non-empty str; gold queries repeat across runs and metrics."""
     try:
         # Parse and format the SQL
         parsed = sqlparse.parse(query)[0]
@@ -6,9 +6,28 @@ Tổng hợp từ create_std_level.py và normalize_to_std.py
 
 import json
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Any
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+# Chuỗi nằm trong dấu nháy kép
+_QUOTED_STRING_RE = re.compile(r'"([^"]*)"')
+# Chuỗi liên tiếp các dấu gạch dưới / khoảng trắng
+_SEPARATOR_RUN_RE = re.compile(r'[\s_]+')
+
+
+@lru_cache(maxsize=None)
+def _normalize_token(token):
+    """Cached token normalization; table/column names repeat heavily."""
+    return _SEPARATOR_RUN_RE.sub('_', token).strip('_')
+
+
 class DatasetNormalizer:
     def __init__(self, base_path: str = "dataset/ViText2SQL"):
         self.base_path = Path(base_path)
@@ -19,45 +38,54 @@ class DatasetNormalizer:
         print(f"📂 Thư mục đích: {self.std_path}")
     
     def load_json_file(self, file_path):
-        """Load JSON file."""
+        """Load JSON file (orjson khi có, nhanh hơn nhiều với train.json lớn)."""
+        if orjson is not None:
+            return orjson.loads(Path(file_path).read_bytes())
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     
     def save_json_file(self, data, file_path):
-        """Save data to JSON file."""
+        """
+        Stream items to a JSON array file, one item per line.
+        Accepts any iterable so generators are never materialized.
+        Returns the number of items written.
+        """
         file_path.parent.mkdir(parents=True, exist_ok=True)
+        count = 0
         with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write('[\n')
+            for item in data:
+                if count:
+                    f.write(',\n')
+                if orjson is not None:
+                    f.write(orjson.dumps(item).decode('utf-8'))
+                else:
+                    f.write(json.dumps(item, ensure_ascii=False))
+                count += 1
+            f.write('\n]\n')
+        return count
     
     def normalize_token(self, token):
         """
         Normalize a token from word-level to std-level format.
-        - Replace underscores with spaces first, then convert to snake_case
+        - Collapse runs of underscores/whitespace into a single underscore
+          and trim them from both ends (same as splitting on '_' and
+          whitespace, then re-joining with '_')
         """
-        # First, replace underscores with spaces to get the original form
-        token_with_spaces = token.replace('_', ' ')
-        
-        # Then convert to proper snake_case
-        parts = token_with_spaces.split()
-        normalized = '_'.join(parts)
-        
-        return normalized
+        return _normalize_token(token)
     
     def fix_quoted_strings(self, query):
         """
         Fix quoted strings in query: replace underscores with spaces inside quotes.
         """
-        def replace_in_quotes(match):
-            quoted_content = match.group(1)
-            # Replace underscores with spaces inside quotes
-            fixed_content = quoted_content.replace('_', ' ')
-            return f'"{fixed_content}"'
+        # Most queries have no string literal, skip the regex engine entirely
+        if '"' not in query:
+            return query
         
-        # Find all quoted strings and fix them
-        pattern = r'"([^"]*)"'
-        fixed_query = re.sub(pattern, replace_in_quotes, query)
-        
-        return fixed_query
+        return _QUOTED_STRING_RE.sub(
+            lambda match: '"' + match.group(1).replace('_', ' ') + '"',
+            query
+        )
     
     def normalize_question(self, question):
         """
@@ -89,22 +117,18 @@ class DatasetNormalizer:
             if key in word_schema:
                 normalized_schema[key] = word_schema[key]
         
-        # Normalize table names
-        normalized_schema['table_names'] = []
-        normalized_schema['table_names_original'] = []
-        for table_name in word_schema['table_names']:
-            normalized_name = self.normalize_token(table_name)
-            normalized_schema['table_names'].append(normalized_name)
-            normalized_schema['table_names_original'].append(normalized_name)
+        # Normalize table names (original names are identical after normalization)
+        table_names = [_normalize_token(table_name) for table_name in word_schema['table_names']]
+        normalized_schema['table_names'] = table_names
+        normalized_schema['table_names_original'] = list(table_names)
         
         # Normalize column names
-        normalized_schema['column_names'] = []
-        normalized_schema['column_names_original'] = []
-        for col_info in word_schema['column_names']:
-            table_idx, col_name = col_info
-            normalized_col_name = self.normalize_token(col_name)
-            normalized_schema['column_names'].append([table_idx, normalized_col_name])
-            normalized_schema['column_names_original'].append([table_idx, normalized_col_name])
+        column_names = [
+            [table_idx, _normalize_token(col_name)]
+            for table_idx, col_name in word_schema['column_names']
+        ]
+        normalized_schema['column_names'] = column_names
+        normalized_schema['column_names_original'] = list(column_names)
         
         # Normalize column types
         if 'column_types' in word_schema:
@@ -116,29 +140,44 @@ class DatasetNormalizer:
         """
         Process query_toks and normalize tokens using simple replace.
         """
-        normalized_toks = []
-        
+        return [_normalize_token(token) for token in query_toks]
+    
+    def build_normalized_query(self, query_toks):
+        """
+        Normalize query_toks and join them into a query, replacing underscores
+        with spaces inside quoted strings while walking the tokens.
+        Same result as process_query_toks + ' '.join + fix_quoted_strings.
+        """
+        parts = []
+        in_quote = False
         for token in query_toks:
-            # Simply normalize each token
-            normalized_toks.append(self.normalize_token(token))
+            token = _normalize_token(token)
+            if '"' in token:
+                pieces = token.split('"')
+                last = len(pieces) - 1
+                for i, piece in enumerate(pieces):
+                    if in_quote:
+                        pieces[i] = piece.replace('_', ' ')
+                    if i < last:
+                        in_quote = not in_quote
+                token = '"'.join(pieces)
+            elif in_quote:
+                token = token.replace('_', ' ')
+            parts.append(token)
         
-        return normalized_toks
+        if in_quote:
+            # Unclosed quote: text after it must stay untouched, redo it the slow way
+            return self.fix_quoted_strings(' '.join(self.process_query_toks(query_toks)))
+        
+        return ' '.join(parts)
     
-    def normalize_data(self, word_level_data):
+    def iter_normalized_data(self, word_level_data):
         """
-        Normalize data from word-level to std-level format.
+        Yield items normalized from word-level to std-level format.
         """
-        normalized_data = []
-        
         for word_item in word_level_data:
-            # Process query_toks
-            normalized_toks = self.process_query_toks(word_item['query_toks'])
-            
-            # Join tokens to create normalized query
-            normalized_query = ' '.join(normalized_toks)
-            
-            # Fix quoted strings (replace underscores with spaces inside quotes)
-            normalized_query = self.fix_quoted_strings(normalized_query)
+            # Normalize query_toks and fix quoted strings in one pass
+            normalized_query = self.build_normalized_query(word_item['query_toks'])
             
             # Normalize question (replace underscores with spaces)
             normalized_question = self.normalize_question(word_item['question'])
@@ -154,16 +193,24 @@ class DatasetNormalizer:
             if 'question_id' in word_item:
                 normalized_item['question_id'] = word_item['question_id']
             
-            normalized_data.append(normalized_item)
-        
-        return normalized_data
+            yield normalized_item
+    
+    def normalize_data(self, word_level_data):
+        """
+        Normalize data from word-level to std-level format.
+        """
+        return list(self.iter_normalized_data(word_level_data))
+    
+    def convert_split(self, word_file: Path, std_file: Path) -> int:
+        """Chuẩn hóa một split word-level và ghi ra std-level, trả về số mẫu"""
+        word_data = self.load_json_file(word_file)
+        return self.save_json_file(self.iter_normalized_data(word_data), std_file)
     
     def create_gold_sql(self, data_file: str, output_file: str):
         """Tạo file gold SQL cho test set"""
         print(f"Tạo gold SQL {data_file} -> {output_file}")
         
-        with open(data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = self.load_json_file(data_file)
         
         gold_sql = []
         for item in data:
@@ -201,46 +248,26 @@ class DatasetNormalizer:
         print("\n📋 Bước 1: Tạo tables.json...")
         if word_tables.exists():
             word_schemas = self.load_json_file(word_tables)
-            std_schemas = []
-            
-            for schema in word_schemas:
-                normalized_schema = self.normalize_schema(schema)
-                std_schemas.append(normalized_schema)
-            
+            std_schemas = (self.normalize_schema(schema) for schema in word_schemas)
             self.save_json_file(std_schemas, std_tables)
             print(f"✅ Đã tạo {std_tables}")
         else:
             print("⚠️ Không tìm thấy tables.json trong word-level")
         
-        # 2. Tạo train.json
-        print("\n📚 Bước 2: Tạo train.json...")
-        if word_train.exists():
-            word_train_data = self.load_json_file(word_train)
-            normalized_train = self.normalize_data(word_train_data)
-            self.save_json_file(normalized_train, std_train)
-            print(f"✅ Đã tạo {std_train} với {len(normalized_train)} samples")
-        else:
-            print("⚠️ Không tìm thấy train.json trong word-level")
-        
-        # 3. Tạo dev.json
-        print("\n🧪 Bước 3: Tạo dev.json...")
-        if word_dev.exists():
-            word_dev_data = self.load_json_file(word_dev)
-            normalized_dev = self.normalize_data(word_dev_data)
-            self.save_json_file(normalized_dev, std_dev)
-            print(f"✅ Đã tạo {std_dev} với {len(normalized_dev)} samples")
-        else:
-            print("⚠️ Không tìm thấy dev.json trong word-level")
-        
-        # 4. Tạo test.json
-        print("\n🧪 Bước 4: Tạo test.json...")
-        if word_test.exists():
-            word_test_data = self.load_json_file(word_test)
-            normalized_test = self.normalize_data(word_test_data)
-            self.save_json_file(normalized_test, std_test)
-            print(f"✅ Đã tạo {std_test} với {len(normalized_test)} samples")
-        else:
-            print("⚠️ Không tìm thấy test.json trong word-level")
+        # 2-4. Tạo train.json, dev.json, test.json (các split độc lập, chạy song song)
+        print("\n📚 Bước 2-4: Tạo train.json, dev.json, test.json...")
+        splits = [(word_train, std_train), (word_dev, std_dev), (word_test, std_test)]
+        with ProcessPoolExecutor(max_workers=len(splits)) as executor:
+            futures = {}
+            for word_file, std_file in splits:
+                if word_file.exists():
+                    futures[executor.submit(self.convert_split, word_file, std_file)] = std_file
+                else:
+                    print(f"⚠️ Không tìm thấy {word_file.name} trong word-level")
+            
+            for future, std_file in futures.items():
+                count = future.result()
+                print(f"✅ Đã tạo {std_file} với {count} samples")
         
         # 5. Tạo gold SQL cho test set
         print("\n📝 Bước 5: Tạo test_gold.sql...")
@@ -0,0 +1,33 @@
+"""Tests for UnifiedEvaluator.extract_sql_clauses."""
+
+from types import SimpleNamespace
+
+from mint.evaluator import UnifiedEvaluator
+
+
+def _clauses(sql):
+    return UnifiedEvaluator(SimpleNamespace()).extract_sql_clauses(sql)
+
+
+def test_paren_inside_string_literal_does_not_hide_later_clauses():
+    clauses = _clauses("SELECT name FROM t WHERE name = 'a (b' GROUP BY name ORDER BY name")
+    assert clauses == {
+        'SELECT': 'name',
+        'FROM': 't',
+        'WHERE': "name = 'a (b'",
+        'GROUP BY': 'name',
+        'ORDER BY': 'name',
+    }
+
+
+def test_keyword_inside_string_literal_is_not_a_clause():
+    clauses = _clauses('SELECT a FROM t WHERE b = "x from y" ORDER BY a')
+    assert clauses['WHERE'] == 'b = "x from y"'
+    assert clauses['ORDER BY'] == 'a'
+
+
+def test_subquery_clauses_are_skipped():
+    clauses = _clauses("SELECT a FROM t WHERE b IN (SELECT b FROM u WHERE c = 1) ORDER BY a")
+    assert clauses['FROM'] == 't'
+    assert clauses['WHERE'] == 'b IN (SELECT b FROM u WHERE c = 1)'
+    assert clauses['ORDER BY'] == 'a'
@@ -27,12 +27,26 @@ Usage:
 import argparse
 import json
 import sys
+import threading
 import time
+from dataclasses import asdict, is_dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
 import re # Added for detailed SQL clause analysis
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+try:
+    from tqdm import tqdm
+except ImportError:  # tqdm is optional, fall back to per-sample prints
+    tqdm = None
+
 # Import MINT components
 from mint import (
     ViPERConfig, 
@@ -41,6 +55,37 @@ from mint import (
     load_dataset,
     UnifiedEvaluator
 )
+from mint.utils import progress_write
+
+
+def _json_default(obj: Any) -> Any:
+    """JSON fallback for non-native values: dataclasses as dicts, the rest as str."""
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    return str(obj)
+
+
+def _to_json_line(record: Dict[str, Any]) -> bytes:
+    """Serialize one record as a compact, newline-terminated JSON line."""
+    if orjson is not None:
+        return orjson.dumps(
+            record,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        )
+    line = json.dumps(record, ensure_ascii=False, default=_json_default, separators=(',', ':'))
+    return (line + '\n').encode('utf-8')
+
+
+@lru_cache(maxsize=4)
+def _load_tables_info(tables_file: str) -> Dict[str, Dict[str, Any]]:
+    """Load tables.json into a db_id -> schema map (cached, schemas are static)."""
+    if orjson is not None:
+        tables_list = orjson.loads(Path(tables_file).read_bytes())
+    else:
+        with open(tables_file, 'r', encoding='utf-8') as f:
+            tables_list = json.load(f)
+    return {table['db_id']: table for table in tables_list}
 
 
 class ViPERSQLCLI:
@@ -56,6 +101,12 @@ class ViPERSQLCLI:
         self.config = config
         self.strategy = create_strategy(config.strategy, **config.to_dict())
         self.evaluator = UnifiedEvaluator(config)
+        # Mỗi luồng worker của run_evaluation có strategy (và LLM client) riêng
+        self._thread_local = threading.local()
+        # Giới hạn số request LLM đang chạy cùng lúc
+        self._request_semaphore = threading.Semaphore(max(1, config.max_concurrent_requests))
+        # Dataset directory is fixed for the CLI's lifetime, resolve it once
+        self._dataset_dir = Path(config.dataset_full_path)
         
         print("🚀 ViPERSQL - Vietnamese Text-to-SQL System")
         print("=" * 60)
@@ -80,15 +131,26 @@ class ViPERSQLCLI:
         
         return result
     
-    def run_evaluation(self) -> Dict[str, Any]:
-        """Run evaluation on dataset."""
+    def _results_base_name(self) -> str:
+        """Base file name (without extension) for this run's result files."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        model_name = self.config.model_name.replace('/', '_')
+        return f"evaluation_{self.config.strategy}_{model_name}_{self.config.split}_{timestamp}"
+    
+    def run_evaluation(self, save_progress: bool = True) -> Dict[str, Any]:
+        """
+        Run evaluation on dataset.
+        
+        When save_progress is set, every finished sample is appended to a
+        results NDJSON file as it completes, so a crash keeps the work done.
+        """
         print(f"\n📊 Running Evaluation")
         print(f"Split: {self.config.split}")
         print(f"Samples: {self.config.samples}")
         print(f"Level: {self.config.level}")
         
         # Load dataset
-        dataset_file = Path(self.config.dataset_full_path) / f"{self.config.split}.json"
+        dataset_file = self._dataset_dir / f"{self.config.split}.json"
         if not dataset_file.exists():
             raise FileNotFoundError(f"Dataset not found: {dataset_file}")
         
@@ -96,13 +158,11 @@ class ViPERSQLCLI:
         dataset = load_dataset(str(dataset_file))
         
         # Load tables schema
-        tables_file = Path(self.config.dataset_full_path) / "tables.json"
+        tables_file = self._dataset_dir / "tables.json"
         if not tables_file.exists():
             raise FileNotFoundError(f"Tables file not found: {tables_file}")
         
-        with open(tables_file, 'r', encoding='utf-8') as f:
-            tables_list = json.load(f)
-        tables_info = {table['db_id']: table for table in tables_list}
+        tables_info = _load_tables_info(str(tables_file))
         
         # Limit samples if specified
         if self.config.samples > 0:
@@ -110,63 +170,93 @@ class ViPERSQLCLI:
         
         print(f"✅ Loaded {len(dataset)} samples")
         
-        # Process samples
+        # Process samples concurrently; LLM calls are network-bound
         results = []
         start_time = time.time()
-        
-        for i, sample in enumerate(dataset, 1):
-            print(f"\n📝 Processing {i}/{len(dataset)}: {sample['db_id']}")
-            
-            # Get schema info
-            schema_info = tables_info.get(sample['db_id'])
-            if not schema_info:
-                print(f"❌ Schema not found for {sample['db_id']}")
-                continue
-            
-            # Generate SQL
-            try:
-                result = self.strategy.generate_sql(
-                    sample['question'], 
-                    schema_info, 
-                    sample['db_id']
-                )
-                
-                # Evaluate result
-                evaluation = self.evaluator.evaluate_single(
-                    predicted_sql=result.sql_query,
-                    gold_sql=sample.get('query', ''),
-                    db_id=sample['db_id'],
-                    request_id=result.request_id
-                )
-                
-                # Store result
-                sample_result = {
-                    'index': i - 1,
-                    'db_id': sample['db_id'],
-                    'question': sample['question'],
-                    'predicted_sql': result.sql_query,
-                    'gold_sql': sample.get('query', ''),
-                    'strategy_result': result,
-                    'evaluation': evaluation
-                }
-                results.append(sample_result)
-                
-                # Print immediate feedback
-                if evaluation.get('exact_match', False):
-                    print("✅ Exact match!")
-                elif evaluation.get('execution_accuracy', False):
-                    print("🟡 Execution accurate but different syntax")
-                else:
-                    print("❌ Incorrect result")
-                    
-            except Exception as e:
-                print(f"❌ Error processing sample: {str(e)}")
-                results.append({
-                    'index': i - 1,
-                    'db_id': sample['db_id'],
-                    'question': sample['question'],
-                    'error': str(e)
-                })
+        total = len(dataset)
+        max_workers = max(1, self.config.max_concurrent_requests)
+        
+        # Append finished samples to disk as they complete (crash resilience)
+        details_path = None
+        details_file = None
+        if save_progress:
+            results_dir = Path(self.config.results_dir)
+            results_dir.mkdir(parents=True, exist_ok=True)
+            details_path = results_dir / f"{self._results_base_name()}.ndjson"
+            details_file = open(details_path, 'ab')
+            print(f"📝 Streaming results to: {details_path}")
+        flush_every = max(1, self.config.batch_size)
+        
+        progress = None
+        futures = {}
+        written = set()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                try:
+                    futures = {
+                        executor.submit(self._process_sample, i, sample, tables_info): sample
+                        for i, sample in enumerate(dataset)
+                    }
+                    completed = as_completed(futures)
+                    if tqdm is not None:
+                        # One progress bar instead of several lines per sample
+                        progress = tqdm(completed, total=total, desc=f"{self.config.split}/{self.config.level}")
+                        completed = progress
+                    exact_count = 0
+                    for done, future in enumerate(completed, 1):
+                        sample = futures[future]
+                        if progress is None:
+                            print(f"\n📝 Processed {done}/{total}: {sample['db_id']}")
+                        sample_result = future.result()
+                        written.add(future)
+                        
+                        if sample_result is None:
+                            progress_write(f"❌ Schema not found for {sample['db_id']}")
+                            continue
+                        results.append(sample_result)
+                        if details_file is not None:
+                            details_file.write(_to_json_line(sample_result))
+                            if len(results) % flush_every == 0:
+                                details_file.flush()
+                        
+                        # Print immediate feedback (only failures when the progress bar is shown)
+                        if 'error' in sample_result:
+                            progress_write(f"❌ Error processing sample: {sample_result['error']}")
+                        elif sample_result['evaluation'].get('exact_match', False):
+                            exact_count += 1
+                            if progress is None:
+                                print("✅ Exact match!")
+                        elif progress is None:
+                            if sample_result['evaluation'].get('execution_accuracy', False):
+                                print("🟡 Execution accurate but different syntax")
+                            else:
+                                print("❌ Incorrect result")
+                        
+                        if progress is not None:
+                            progress.set_postfix(exact=exact_count, refresh=False)
+                except BaseException:
+                    # Ctrl-C hoặc lỗi: hủy các sample chưa chạy (không gọi LLM nữa),
+                    # chỉ chờ các request đang chạy dở
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+        finally:
+            if progress is not None:
+                progress.close()
+            # Bị ngắt giữa chừng: vẫn lưu các sample đã xong nhưng chưa kịp ghi, hủy phần còn lại
+            for future in futures:
+                if future in written:
+                    continue
+                if not future.done():
+                    future.cancel()
+                elif details_file is not None and not future.cancelled() and future.exception() is None:
+                    sample_result = future.result()
+                    if sample_result is not None:
+                        details_file.write(_to_json_line(sample_result))
+            if details_file is not None:
+                details_file.close()
+        
+        # Restore dataset order
+        results.sort(key=lambda r: r['index'])
         
         # Calculate summary
         total_time = time.time() - start_time
@@ -184,30 +274,106 @@ class ViPERSQLCLI:
                 'total_time': total_time
             },
             'summary': summary,
-            'detailed_results': results
+            'detailed_results': results,
+            'detailed_results_file': str(details_path) if details_path else None
         }
         
         return evaluation_results
     
+    def _worker_strategy(self):
+        """Strategy owned by the calling worker thread, created on first use."""
+        strategy = getattr(self._thread_local, 'strategy', None)
+        if strategy is None:
+            strategy = create_strategy(self.config.strategy, **self.config.to_dict())
+            self._thread_local.strategy = strategy
+        return strategy
+    
+    def _process_sample(
+        self,
+        index: int,
+        sample: Dict[str, Any],
+        tables_info: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Generate and evaluate SQL for one sample (runs in a worker thread)."""
+        # Get schema info
+        schema_info = tables_info.get(sample['db_id'])
+        if not schema_info:
+            return None
+        
+        try:
+            # Generate SQL with this thread's own client, capped by the semaphore
+            strategy = self._worker_strategy()
+            with self._request_semaphore:
+                result = strategy.generate_sql(
+                    sample['question'], 
+                    schema_info, 
+                    sample['db_id']
+                )
+            
+            # Evaluate result
+            evaluation = self.evaluator.evaluate_single(
+                predicted_sql=result.sql_query,
+                gold_sql=sample.get('query', ''),
+                db_id=sample['db_id'],
+                request_id=result.request_id
+            )
+            
+            return {
+                'index': index,
+                'db_id': sample['db_id'],
+                'question': sample['question'],
+                'predicted_sql': result.sql_query,
+                'gold_sql': sample.get('query', ''),
+                'strategy_result': result,
+                'evaluation': evaluation
+            }
+        except Exception as e:
+            return {
+                'index': index,
+                'db_id': sample['db_id'],
+                'question': sample['question'],
+                'error': str(e)
+            }
+    
     def save_results(self, results: Dict[str, Any]) -> str:
         """Save evaluation results to file."""
         # Create output directory
         Path(self.config.results_dir).mkdir(exist_ok=True)
         
-        # Generate filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        strategy = results['config']['strategy']
-        model_name = results['config']['model'].replace('/', '_')
-        split = results['config']['split']
-        filename = f"evaluation_{strategy}_{model_name}_{split}_{timestamp}.json"
-        filepath = Path(self.config.results_dir) / filename
-        
-        # Save results
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False, default=str)
-        
-        print(f"\n💾 Results saved to: {filepath}")
-        return str(filepath)
+        # Reuse the NDJSON file streamed during run_evaluation when there is one
+        streamed_file = results.get('detailed_results_file')
+        if streamed_file:
+            details_path = Path(streamed_file)
+            summary_path = details_path.with_suffix('.json')
+        else:
+            base_name = self._results_base_name()
+            summary_path = Path(self.config.results_dir) / f"{base_name}.json"
+            details_path = Path(self.config.results_dir) / f"{base_name}.ndjson"
+        
+        # Pretty-print only the small config + summary header
+        header = {
+            'config': results['config'],
+            'summary': results['summary'],
+            'detailed_results_file': details_path.name
+        }
+        if orjson is not None:
+            summary_path.write_bytes(orjson.dumps(
+                header,
+                default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ))
+        else:
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                json.dump(header, f, indent=2, ensure_ascii=False, default=str)
+        
+        # Detailed results are machine-consumed: one compact JSON object per line
+        if not streamed_file:
+            with open(details_path, 'wb') as f:
+                for record in results['detailed_results']:
+                    f.write(_to_json_line(record))
+        
+        print(f"\n💾 Summary saved to: {summary_path}")
+        return str(details_path)
     
     def print_summary(self, summary: Dict[str, Any]):
         """Print evaluation summary."""
@@ -484,7 +650,7 @@ def main():
             return
         
         # Run evaluation
-        results = cli.run_evaluation()
+        results = cli.run_evaluation(save_progress=not args.no_save)
         
         # Print summary
         cli.print_summary(results['summary'])